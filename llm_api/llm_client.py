@@ -4,12 +4,21 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import DefaultHttpxClient, OpenAI
 
 # 加载环境变量
 load_dotenv()
 
+# chat_once 失败时返回以此开头的文本，而不是抛出异常
+LLM_ERROR_PREFIX = "Error in chat_once"
+
+# 连接池：保持空闲连接足够久，避免相邻两次调用之间重新建立 TCP/TLS 连接
+HTTP_LIMITS = httpx.Limits(
+    max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0
+)
+
 class LLMClient:
     def __init__(self, log_path: Optional[str | Path] = None):
         """
@@ -23,7 +32,13 @@ class LLMClient:
         if not api_key:
             raise ValueError("Environment variable OPENAI_API_KEY is not set")
             
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # DefaultHttpxClient 保留 SDK 的默认设置（超时、follow_redirects 等），
+        # 只替换连接池上限：最多 32 个连接、16 个保活连接，空闲连接保留 60 秒
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=DefaultHttpxClient(limits=HTTP_LIMITS),
+        )
         self.log_path = Path(log_path) if log_path else Path("log") / "llm.log"
 
     def chat_once(
@@ -55,7 +70,7 @@ class LLMClient:
             self._log_llm_call(messages, output, label=log_label)
             return output
         except Exception as e:
-            error_text = f"Error in chat_once: {str(e)}"
+            error_text = f"{LLM_ERROR_PREFIX}: {str(e)}"
             error_detail = traceback.format_exc()
             self._log_llm_call(
                 messages,
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import json
+import os
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Add project root to sys.path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from character.character_engine import CharacterEngine, CharacterRequest
+if TYPE_CHECKING:
+    from character.character_engine import CharacterEngine
+
+LATEST_INDEX = Path("save") / ".latest.json"
 
 
 class DummyLLMClient:
@@ -38,6 +44,9 @@ def run_demo() -> None:
     if not snapshot:
         return
 
+    # Deferred so listing/choosing snapshots does not load the engine + LLM stack.
+    from character.character_engine import CharacterEngine, CharacterRequest
+
     total = _prompt_int("Total characters", default=6, minimum=1)
     pitch = input("Character overview (optional, one sentence): ").strip()
 
@@ -99,18 +108,40 @@ def _list_snapshots() -> list[Path]:
     folder = Path("save") / "world"
     if not folder.exists():
         return []
-    snapshots = sorted(
-        folder.glob("*.json"), key=lambda item: item.stat().st_mtime, reverse=True
-    )
-    return snapshots
+    with os.scandir(folder) as entries:
+        found = [
+            (entry.stat().st_mtime, entry.path)
+            for entry in entries
+            if entry.name.endswith(".json")
+            and not entry.name.startswith(".")
+            and entry.is_file()
+        ]
+    found.sort(key=lambda item: item[0], reverse=True)
+    return [Path(path) for _, path in found]
 
 
 def _save_snapshot(engine: CharacterEngine) -> Path:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = Path("save") / "characters" / f"characters_{timestamp}.json"
     engine.save_snapshot(output_path)
+    _write_latest_index("characters", output_path)
     return output_path
 
 
+def _write_latest_index(kind: str, path: Path) -> None:
+    try:
+        index = json.loads(LATEST_INDEX.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        index = {}
+    if not isinstance(index, dict):
+        index = {}
+    index[kind] = str(path)
+    LATEST_INDEX.parent.mkdir(parents=True, exist_ok=True)
+    # Readers may run concurrently; swap the file in whole so they never see half of it.
+    tmp_path = LATEST_INDEX.with_name(LATEST_INDEX.name + ".tmp")
+    tmp_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, LATEST_INDEX)
+
+
 if __name__ == "__main__":
     run_demo()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import os
 import random
 import sys
 from dataclasses import dataclass
@@ -14,6 +15,8 @@ from character.character_agent import ADD_TAG, CharacterAgent
 from character.character_engine import CharacterEngine, CharacterRecord
 from llm_api.llm_client import LLMClient
 
+_SNIPPET_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+
 
 @dataclass
 class TestResult:
@@ -53,36 +56,44 @@ class RecordingLLMClient:
 
 
 def _snippet(text: str, limit: int = 200) -> str:
-    cleaned = text.replace("\n", " ").strip()
+    cleaned = text.strip()
     if len(cleaned) <= limit:
-        return cleaned
-    return f"{cleaned[:limit - 3]}..."
+        return cleaned.translate(_SNIPPET_TABLE)
+    return f"{cleaned[:limit - 3].translate(_SNIPPET_TABLE)}..."
 
 
 def find_latest_world_snapshot() -> Path | None:
     world_root = Path("save") / "world"
-    if world_root.exists():
-        snapshots = list(world_root.glob("*.json"))
-        if snapshots:
-            return max(snapshots, key=lambda item: item.stat().st_mtime)
-
-    root = Path("save")
-    if not root.exists():
-        return None
-    snapshots = [path for path in root.glob("world_*.json")]
-    if not snapshots:
-        return None
-    return max(snapshots, key=lambda item: item.stat().st_mtime)
+    latest = _latest_json(world_root)
+    if latest:
+        return latest
+    return _latest_json(Path("save"), prefix="world_")
 
 
 def find_latest_character_snapshot() -> Path | None:
     folder = Path("save") / "characters"
-    if not folder.exists():
-        return None
-    snapshots = list(folder.glob("*.json"))
-    if not snapshots:
+    return _latest_json(folder)
+
+
+def _latest_json(folder: Path, prefix: str = "") -> Path | None:
+    latest_path = ""
+    latest_mtime = 0.0
+    try:
+        entries = os.scandir(folder)
+    except FileNotFoundError:
         return None
-    return max(snapshots, key=lambda item: item.stat().st_mtime)
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith(".") or not name.endswith(".json"):
+                continue
+            if not name.startswith(prefix) or not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            if not latest_path or mtime > latest_mtime:
+                latest_path = entry.path
+                latest_mtime = mtime
+    return Path(latest_path) if latest_path else None
 
 
 def load_character_snapshot(
@@ -302,18 +313,19 @@ def summarize_results(title: str, results: List[TestResult]) -> None:
     total = len(results)
     passed = sum(1 for result in results if result.success)
     rate = (passed / total * 100) if total else 0.0
-    print(f"\n[{title}] {passed}/{total} ({rate:.1f}%)")
+    lines = [f"\n[{title}] {passed}/{total} ({rate:.1f}%)"]
     for index, result in enumerate(results, start=1):
         status = "PASS" if result.success else "FAIL"
         detail = f" - {result.detail}" if result.detail else ""
-        print(f"{index}. {status}: {result.name}{detail}")
+        lines.append(f"{index}. {status}: {result.name}{detail}")
         if not result.success and result.detail:
-            print(f"   reason: {result.detail}")
+            lines.append(f"   reason: {result.detail}")
         if not result.success and (result.expected_output or result.actual_output):
             expected = _snippet(result.expected_output) if result.expected_output else "N/A"
             actual = _snippet(result.actual_output) if result.actual_output else "N/A"
-            print(f"   expected_llm: {expected}")
-            print(f"   actual_llm: {actual}")
+            lines.append(f"   expected_llm: {expected}")
+            lines.append(f"   actual_llm: {actual}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def run_demo() -> None:
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import functools
 import json
+import os
 import random
 import sys
 from dataclasses import dataclass
@@ -17,6 +19,22 @@ from llm_api.llm_client import LLMClient
 from world.world_agent import WorldAgent
 from world.world_engine import WorldEngine
 
+LATEST_INDEX = Path("save") / ".latest.json"
+_SKIP_IDS = frozenset({"world", "macro", "micro"})
+_SNIPPET_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+_BOTH_TEMPLATE = (
+    "剧情更新：世界节点{node_id} {node_key}出现重大变化，"
+    "必须更新世界设定；角色{label}发生转折，必须更新角色档案。"
+)
+_WORLD_ONLY_TEMPLATE = (
+    "剧情更新：世界节点{node_id} {node_key}发生重大变化，"
+    "需要更新世界设定，不涉及任何具体角色。"
+)
+_CHARACTER_ONLY_TEMPLATE = (
+    "剧情更新：角色{label}发生重大转折，需要更新角色档案，"
+    "不涉及世界设定或地理势力变化。"
+)
+
 
 @dataclass
 class TestResult:
@@ -31,6 +49,7 @@ class RecordingLLMClient:
     def __init__(self, inner: LLMClient) -> None:
         self.inner = inner
         self.calls: list[dict[str, str]] = []
+        self._last_index_by_label: dict[str, int] = {}
 
     def chat_once(
         self, prompt: str, system_prompt: str = "", log_label: str | None = None
@@ -46,46 +65,84 @@ class RecordingLLMClient:
                 "output": output,
             }
         )
+        self._last_index_by_label[log_label or ""] = len(self.calls) - 1
         return output
 
-    def last_output(self, label: str) -> str:
-        for call in reversed(self.calls):
-            if call["label"] == label:
-                return call["output"]
-        return ""
+    def last_output_since(self, label: str, cursor: int) -> str:
+        index = self._last_index_by_label.get(label)
+        if index is None or index < cursor:
+            return ""
+        return self.calls[index]["output"]
 
 
 def _snippet(text: str, limit: int = 200) -> str:
-    cleaned = text.replace("\n", " ").strip()
+    cleaned = text.strip()
     if len(cleaned) <= limit:
-        return cleaned
-    return f"{cleaned[:limit - 3]}..."
-
+        return cleaned.translate(_SNIPPET_TABLE)
+    return f"{cleaned[:limit - 3].translate(_SNIPPET_TABLE)}..."
 
-def find_latest_world_snapshot() -> Path | None:
-    world_root = Path("save") / "world"
-    if world_root.exists():
-        snapshots = list(world_root.glob("*.json"))
-        if snapshots:
-            return max(snapshots, key=lambda item: item.stat().st_mtime)
 
-    root = Path("save")
-    if not root.exists():
+def _read_latest_index(kind: str, folders: tuple[Path, ...]) -> Path | None:
+    # The index is only trusted while no watched folder changed after it was written.
+    try:
+        index_mtime = LATEST_INDEX.stat().st_mtime
+        index = json.loads(LATEST_INDEX.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
         return None
-    snapshots = [path for path in root.glob("world_*.json")]
-    if not snapshots:
+    for folder in folders:
+        try:
+            if folder.stat().st_mtime > index_mtime:
+                return None
+        except OSError:
+            continue
+    path_text = index.get(kind) if isinstance(index, dict) else None
+    if not path_text:
         return None
-    return max(snapshots, key=lambda item: item.stat().st_mtime)
+    path = Path(path_text)
+    return path if path.is_file() else None
 
 
+@functools.cache
+def find_latest_world_snapshot() -> Path | None:
+    indexed = _read_latest_index("world", (Path("save") / "world", Path("save")))
+    if indexed:
+        return indexed
+
+    world_root = Path("save") / "world"
+    latest = _latest_json(world_root)
+    if latest:
+        return latest
+    return _latest_json(Path("save"), prefix="world_")
+
+
+@functools.cache
 def find_latest_character_snapshot() -> Path | None:
     folder = Path("save") / "characters"
-    if not folder.exists():
-        return None
-    snapshots = list(folder.glob("*.json"))
-    if not snapshots:
+    indexed = _read_latest_index("characters", (folder,))
+    if indexed:
+        return indexed
+    return _latest_json(folder)
+
+
+def _latest_json(folder: Path, prefix: str = "") -> Path | None:
+    latest_path = ""
+    latest_mtime = 0.0
+    try:
+        entries = os.scandir(folder)
+    except FileNotFoundError:
         return None
-    return max(snapshots, key=lambda item: item.stat().st_mtime)
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith(".") or not name.endswith(".json"):
+                continue
+            if not name.startswith(prefix) or not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            if not latest_path or mtime > latest_mtime:
+                latest_path = entry.path
+                latest_mtime = mtime
+    return Path(latest_path) if latest_path else None
 
 
 def load_character_snapshot(
@@ -94,7 +151,8 @@ def load_character_snapshot(
     payload = json.loads(snapshot_path.read_text(encoding="utf-8"))
     records: list[CharacterRecord] = []
     for item in payload.get("characters", []):
-        identifier = str(item.get("id", "")).strip()
+        raw_id = item.get("id", "")
+        identifier = raw_id.strip() if isinstance(raw_id, str) else str(raw_id).strip()
         if not identifier:
             continue
         records.append(
@@ -105,7 +163,12 @@ def load_character_snapshot(
                 profile=item.get("profile", {}),
             )
         )
-    world_path_text = str(payload.get("world_snapshot_path", "")).strip()
+    raw_world_path = payload.get("world_snapshot_path", "")
+    world_path_text = (
+        raw_world_path.strip()
+        if isinstance(raw_world_path, str)
+        else str(raw_world_path).strip()
+    )
     world_path = Path(world_path_text) if world_path_text else None
     if world_path and not world_path.exists():
         world_path = None
@@ -138,9 +201,12 @@ def choose_world_targets(
 ) -> list[tuple[str, str]]:
     candidates: list[tuple[str, str]] = []
     for identifier, node in snapshot.items():
-        if identifier in {"world", "macro", "micro"}:
+        if identifier in _SKIP_IDS:
             continue
-        key = str(node.get("key", node.get("title", ""))).strip()
+        key = node.get("key")
+        if key is None:
+            key = node.get("title", "")
+        key = str(key).strip()
         if not key:
             continue
         candidates.append((identifier, key))
@@ -194,24 +260,29 @@ def format_character_label(record: CharacterRecord) -> str:
     return name or record.identifier
 
 
+def _has_text(value: object) -> bool:
+    if isinstance(value, str):
+        return bool(value) and not value.isspace()
+    return bool(str(value).strip())
+
+
 def _has_world_updates(result: GameUpdateResult) -> bool:
-    nodes = result.world_nodes or ([result.world_node] if result.world_node else [])
-    return any(node and node.value.strip() for node in nodes)
+    nodes = result.world_nodes or ((result.world_node,) if result.world_node else ())
+    return any(node and _has_text(node.value) for node in nodes)
 
 
 def _has_character_updates(result: GameUpdateResult) -> bool:
-    records = (
-        result.character_records
-        or ([result.character_record] if result.character_record else [])
+    records = result.character_records or (
+        (result.character_record,) if result.character_record else ()
     )
-    return any(record and str(record.profile).strip() for record in records)
+    return any(record and _has_text(record.profile) for record in records)
 
 
 def run_both_tests(
     world_snapshot: Path,
     world_data: dict[str, dict[str, object]],
     records: list[CharacterRecord],
-    base_llm: LLMClient,
+    recorder: RecordingLLMClient,
 ) -> list[TestResult]:
     results: list[TestResult] = []
     world_targets = choose_world_targets(world_data)
@@ -221,13 +292,12 @@ def run_both_tests(
 
     cases = list(zip(world_targets, character_targets))
     for index, ((node_id, node_key), record) in enumerate(cases, start=1):
-        recorder = RecordingLLMClient(base_llm)
         game_agent, _, _ = build_agents(world_snapshot, records, recorder)
         label = format_character_label(record)
-        update_info = (
-            f"剧情更新：世界节点{node_id} {node_key}出现重大变化，"
-            f"必须更新世界设定；角色{label}发生转折，必须更新角色档案。"
+        update_info = _BOTH_TEMPLATE.format(
+            node_id=node_id, node_key=node_key, label=label
         )
+        cursor = len(recorder.calls)
         try:
             result = game_agent.apply_update(update_info)
         except Exception as exc:
@@ -237,7 +307,7 @@ def run_both_tests(
                     False,
                     f"exception: {exc}",
                     expected_output="WORLD=YES; CHARACTER=YES",
-                    actual_output=recorder.last_output("GAME_DECIDE"),
+                    actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
                 )
             )
             continue
@@ -259,7 +329,7 @@ def run_both_tests(
                 success,
                 detail,
                 expected_output="WORLD=YES; CHARACTER=YES",
-                actual_output=recorder.last_output("GAME_DECIDE"),
+                actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
             )
         )
     return results
@@ -269,7 +339,7 @@ def run_world_only_tests(
     world_snapshot: Path,
     world_data: dict[str, dict[str, object]],
     records: list[CharacterRecord],
-    base_llm: LLMClient,
+    recorder: RecordingLLMClient,
 ) -> list[TestResult]:
     results: list[TestResult] = []
     world_targets = choose_world_targets(world_data)
@@ -277,12 +347,9 @@ def run_world_only_tests(
         return [TestResult("world_only", False, "missing_world_targets")]
 
     for index, (node_id, node_key) in enumerate(world_targets, start=1):
-        recorder = RecordingLLMClient(base_llm)
         game_agent, _, _ = build_agents(world_snapshot, records, recorder)
-        update_info = (
-            f"剧情更新：世界节点{node_id} {node_key}发生重大变化，"
-            "需要更新世界设定，不涉及任何具体角色。"
-        )
+        update_info = _WORLD_ONLY_TEMPLATE.format(node_id=node_id, node_key=node_key)
+        cursor = len(recorder.calls)
         try:
             result = game_agent.apply_update(update_info)
         except Exception as exc:
@@ -292,7 +359,7 @@ def run_world_only_tests(
                     False,
                     f"exception: {exc}",
                     expected_output="WORLD=YES; CHARACTER=NO",
-                    actual_output=recorder.last_output("GAME_DECIDE"),
+                    actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
                 )
             )
             continue
@@ -310,7 +377,7 @@ def run_world_only_tests(
                 success,
                 detail,
                 expected_output="WORLD=YES; CHARACTER=NO",
-                actual_output=recorder.last_output("GAME_DECIDE"),
+                actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
             )
         )
     return results
@@ -319,7 +386,7 @@ def run_world_only_tests(
 def run_character_only_tests(
     world_snapshot: Path,
     records: list[CharacterRecord],
-    base_llm: LLMClient,
+    recorder: RecordingLLMClient,
 ) -> list[TestResult]:
     results: list[TestResult] = []
     character_targets = choose_character_targets(records)
@@ -327,13 +394,10 @@ def run_character_only_tests(
         return [TestResult("character_only", False, "missing_character_targets")]
 
     for index, record in enumerate(character_targets, start=1):
-        recorder = RecordingLLMClient(base_llm)
         game_agent, _, _ = build_agents(world_snapshot, records, recorder)
         label = format_character_label(record)
-        update_info = (
-            f"剧情更新：角色{label}发生重大转折，需要更新角色档案，"
-            "不涉及世界设定或地理势力变化。"
-        )
+        update_info = _CHARACTER_ONLY_TEMPLATE.format(label=label)
+        cursor = len(recorder.calls)
         try:
             result = game_agent.apply_update(update_info)
         except Exception as exc:
@@ -343,7 +407,7 @@ def run_character_only_tests(
                     False,
                     f"exception: {exc}",
                     expected_output="WORLD=NO; CHARACTER=YES",
-                    actual_output=recorder.last_output("GAME_DECIDE"),
+                    actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
                 )
             )
             continue
@@ -361,7 +425,7 @@ def run_character_only_tests(
                 success,
                 detail,
                 expected_output="WORLD=NO; CHARACTER=YES",
-                actual_output=recorder.last_output("GAME_DECIDE"),
+                actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
             )
         )
     return results
@@ -370,7 +434,7 @@ def run_character_only_tests(
 def run_skip_tests(
     world_snapshot: Path,
     records: list[CharacterRecord],
-    base_llm: LLMClient,
+    recorder: RecordingLLMClient,
 ) -> list[TestResult]:
     results: list[TestResult] = []
     prompts = [
@@ -380,8 +444,8 @@ def run_skip_tests(
     ]
 
     for index, update_info in enumerate(prompts, start=1):
-        recorder = RecordingLLMClient(base_llm)
         game_agent, _, _ = build_agents(world_snapshot, records, recorder)
+        cursor = len(recorder.calls)
         try:
             result = game_agent.apply_update(update_info)
         except Exception as exc:
@@ -391,7 +455,7 @@ def run_skip_tests(
                     False,
                     f"exception: {exc}",
                     expected_output="WORLD=NO; CHARACTER=NO",
-                    actual_output=recorder.last_output("GAME_DECIDE"),
+                    actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
                 )
             )
             continue
@@ -406,7 +470,7 @@ def run_skip_tests(
                 success,
                 detail,
                 expected_output="WORLD=NO; CHARACTER=NO",
-                actual_output=recorder.last_output("GAME_DECIDE"),
+                actual_output=recorder.last_output_since("GAME_DECIDE", cursor),
             )
         )
     return results
@@ -416,18 +480,19 @@ def summarize_results(title: str, results: List[TestResult]) -> None:
     total = len(results)
     passed = sum(1 for result in results if result.success)
     rate = (passed / total * 100) if total else 0.0
-    print(f"\n[{title}] {passed}/{total} ({rate:.1f}%)")
+    lines = [f"\n[{title}] {passed}/{total} ({rate:.1f}%)"]
     for index, result in enumerate(results, start=1):
         status = "PASS" if result.success else "FAIL"
         detail = f" - {result.detail}" if result.detail else ""
-        print(f"{index}. {status}: {result.name}{detail}")
+        lines.append(f"{index}. {status}: {result.name}{detail}")
         if not result.success and result.detail:
-            print(f"   reason: {result.detail}")
+            lines.append(f"   reason: {result.detail}")
         if not result.success and (result.expected_output or result.actual_output):
             expected = _snippet(result.expected_output) if result.expected_output else "N/A"
             actual = _snippet(result.actual_output) if result.actual_output else "N/A"
-            print(f"   expected_llm: {expected}")
-            print(f"   actual_llm: {actual}")
+            lines.append(f"   expected_llm: {expected}")
+            lines.append(f"   actual_llm: {actual}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def run_demo() -> None:
@@ -457,10 +522,11 @@ def run_demo() -> None:
     print(f"使用世界存档：{world_snapshot}")
     print(f"使用角色存档：{character_snapshot}")
 
-    both_results = run_both_tests(world_snapshot, world_data, records, base_llm)
-    world_results = run_world_only_tests(world_snapshot, world_data, records, base_llm)
-    character_results = run_character_only_tests(world_snapshot, records, base_llm)
-    skip_results = run_skip_tests(world_snapshot, records, base_llm)
+    recorder = RecordingLLMClient(base_llm)
+    both_results = run_both_tests(world_snapshot, world_data, records, recorder)
+    world_results = run_world_only_tests(world_snapshot, world_data, records, recorder)
+    character_results = run_character_only_tests(world_snapshot, records, recorder)
+    skip_results = run_skip_tests(world_snapshot, records, recorder)
 
     summarize_results("世界+角色更新", both_results)
     summarize_results("仅世界更新", world_results)
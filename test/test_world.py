@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import io
 import json
+import operator
+import os
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -10,6 +13,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from world.world_engine import WorldEngine
 
+LATEST_INDEX = Path("save") / ".latest.json"
+_INDENTS = tuple("  " * depth for depth in range(64))
+
 
 class DummyLLMClient:
     """Lightweight stub for offline testing of world generation."""
@@ -73,33 +79,40 @@ def run_demo() -> None:
 
 
 def _write_mindmap(engine: WorldEngine) -> None:
-    lines = ["mindmap", "  root((World))"]
+    buffer = io.StringIO()
+    buffer.write("# World Mindmap\n\n```mermaid\nmindmap\n  root((World))\n")
 
     if engine.root.value:
-        lines.append(f"    初始设定: {engine.root.value}")
-
-    def walk(node, depth: int) -> None:
-        indent = "  " * depth
+        buffer.write(f"    初始设定: {engine.root.value}\n")
+
+    by_identifier = operator.attrgetter("identifier")
+    stack = [
+        (child, 2)
+        for child in sorted(
+            engine.root.children.values(), key=by_identifier, reverse=True
+        )
+    ]
+    while stack:
+        node, depth = stack.pop()
+        indent = _INDENTS[depth] if depth < len(_INDENTS) else "  " * depth
         label = f"{node.identifier} {node.key}".strip()
-        lines.append(f"{indent}{label}")
+        buffer.write(f"{indent}{label}\n")
 
         if node.value:
             for value_line in node.value.splitlines():
-                value_line = value_line.strip()
-                if not value_line:
+                if not value_line or value_line.isspace():
                     continue
-                lines.append(f"{indent}  {value_line}")
+                buffer.write(f"{indent}  {value_line.strip()}\n")
 
-        for child in sorted(node.children.values(), key=lambda item: item.identifier):
-            walk(child, depth + 1)
+        stack.extend(
+            (child, depth + 1)
+            for child in sorted(node.children.values(), key=by_identifier, reverse=True)
+        )
 
-    for child in sorted(engine.root.children.values(), key=lambda item: item.identifier):
-        walk(child, 2)
-
-    content = "# World Mindmap\n\n```mermaid\n" + "\n".join(lines) + "\n```\n"
+    buffer.write("```\n")
     output_path = Path("docs") / "world_mindmap.md"
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(content, encoding="utf-8")
+    output_path.write_text(buffer.getvalue(), encoding="utf-8")
     print(f"\n已生成思维导图文档：{output_path}")
 
 
@@ -162,9 +175,25 @@ def _save_snapshot(engine: WorldEngine) -> None:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = Path("save") / "world" / f"world_{timestamp}.json"
     engine.save_snapshot(output_path)
+    _write_latest_index("world", output_path)
     print(f"\n已保存世界快照：{output_path}")
 
 
+def _write_latest_index(kind: str, path: Path) -> None:
+    try:
+        index = json.loads(LATEST_INDEX.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        index = {}
+    if not isinstance(index, dict):
+        index = {}
+    index[kind] = str(path)
+    LATEST_INDEX.parent.mkdir(parents=True, exist_ok=True)
+    # Readers may run concurrently; swap the file in whole so they never see half of it.
+    tmp_path = LATEST_INDEX.with_name(LATEST_INDEX.name + ".tmp")
+    tmp_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, LATEST_INDEX)
+
+
 def _load_existing_world() -> bool:
     use_saved = input("是否读取已保存的世界? (默认: 否) [y/N]: ").strip().lower()
     if use_saved != "y":
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import random
+import re
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, List, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from llm_api.llm_client import LLMClient
 from world.world_agent import ADD_TAG, WorldAgent
-from world.world_engine import WorldEngine
+from world.world_engine import WorldEngine, WorldNode
 from world.world_prompt import MICRO_POLITY_ASPECTS
 
 
@@ -37,6 +45,25 @@ CHANGES = [
     "职能扩编",
 ]
 
+_ROOT_IDS = frozenset({"world", "macro", "micro"})
+_SNIPPET_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " "})
+LLM_CACHE_ENV = "ROLEPLAY_LLM_CACHE"
+LLM_RPM_ENV = "ROLEPLAY_LLM_RPM"
+LLM_MAX_CONCURRENCY = 4
+LLM_CACHE_PATH = Path("save") / ".llm_cache.jsonl"
+NO_LLM_QUERY_FLAG = "--no-llm-query"
+QUERY_PATTERN = re.compile(r"查询(?P<region>.+?)地区(?P<polity>.+?)政权的(?P<aspect>.+?)内容")
+
+
+@dataclass(frozen=True)
+class MicroAspect:
+    region_id: str
+    region_key: str
+    polity_key: str
+    aspect_id: str
+    aspect_key: str
+    aspect_value: str
+
 
 @dataclass
 class TestResult:
@@ -48,155 +75,319 @@ class TestResult:
 
 
 class RecordingLLMClient:
-    def __init__(self, inner: LLMClient) -> None:
+    def __init__(
+        self,
+        inner: LLMClient,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        rpm: int | None = None,
+    ) -> None:
         self.inner = inner
-        self.calls: list[dict[str, str]] = []
+        self.calls: list[dict[str, Any]] = []
+        self._last_index_by_label: dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+        self.rpm = rpm if rpm is not None else int(os.getenv(LLM_RPM_ENV) or 0)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._window: deque[float] = deque()
+        self._window_lock = threading.Lock()
+        self.cache: dict[str, str] | None = None
+        if os.getenv(LLM_CACHE_ENV) == "1":
+            self.cache = _load_llm_cache()
+            self._cache_lock = threading.Lock()
 
     def chat_once(
         self, prompt: str, system_prompt: str = "", log_label: str | None = None
     ) -> str:
-        output = self.inner.chat_once(
-            prompt, system_prompt=system_prompt, log_label=log_label
-        )
-        self.calls.append(
-            {
-                "label": log_label or "",
-                "prompt": prompt,
-                "system_prompt": system_prompt,
-                "output": output,
-            }
-        )
+        cache_key = ""
+        if self.cache is not None:
+            cache_key = _llm_cache_key(prompt, system_prompt, log_label)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record(prompt, system_prompt, log_label, cached, cached=True)
+                return cached
+        with self._slots:
+            self._wait_for_rate_slot()
+            output = self.inner.chat_once(
+                prompt, system_prompt=system_prompt, log_label=log_label
+            )
+        if cache_key and not output.startswith("Error in chat_once"):
+            self._store_cache(cache_key, output)
+        self._record(prompt, system_prompt, log_label, output)
         return output
 
-    def last_output(self, label: str) -> str:
-        for call in reversed(self.calls):
-            if call["label"] == label:
-                return call["output"]
-        return ""
+    def _wait_for_rate_slot(self) -> None:
+        # Sliding one-minute window: block until fewer than rpm calls were started in it.
+        if self.rpm <= 0:
+            return
+        while True:
+            with self._window_lock:
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 60.0:
+                    self._window.popleft()
+                if len(self._window) < self.rpm:
+                    self._window.append(now)
+                    return
+                delay = 60.0 - (now - self._window[0])
+            time.sleep(delay)
+
+    def _store_cache(self, cache_key: str, output: str) -> None:
+        # Append-only: each new response is persisted immediately, nothing is rewritten.
+        line = json.dumps({"key": cache_key, "output": output}, ensure_ascii=False)
+        with self._cache_lock:
+            self.cache[cache_key] = output
+            try:
+                LLM_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                with LLM_CACHE_PATH.open("a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+            except OSError:
+                return
+
+    def _record(
+        self,
+        prompt: str,
+        system_prompt: str,
+        log_label: str | None,
+        output: str,
+        cached: bool = False,
+    ) -> None:
+        with self._calls_lock:
+            self.calls.append(
+                {
+                    "label": log_label or "",
+                    "prompt": prompt,
+                    "system_prompt": system_prompt,
+                    "output": output,
+                    "cached": cached,
+                }
+            )
+            self._last_index_by_label[log_label or ""] = len(self.calls) - 1
+
+    def last_output_since(self, label: str, cursor: int) -> str:
+        index = self._last_index_by_label.get(label)
+        if index is None or index < cursor:
+            return ""
+        return self.calls[index]["output"]
+
+
+def _llm_cache_key(prompt: str, system_prompt: str, log_label: str | None) -> str:
+    payload = "\x00".join((log_label or "", system_prompt, prompt))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _load_llm_cache() -> dict[str, str]:
+    cache: dict[str, str] = {}
+    try:
+        with LLM_CACHE_PATH.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and "key" in entry and "output" in entry:
+                    cache[str(entry["key"])] = str(entry["output"])
+    except OSError:
+        return {}
+    return cache
 
 
 def _snippet(text: str, limit: int = 200) -> str:
-    cleaned = text.replace("\n", " ").strip()
+    cleaned = text.strip()
     if len(cleaned) <= limit:
-        return cleaned
-    return f"{cleaned[:limit - 3]}..."
+        return cleaned.translate(_SNIPPET_TABLE)
+    return f"{cleaned[:limit - 3].translate(_SNIPPET_TABLE)}..."
 
 
 def find_latest_snapshot() -> Path | None:
     world_root = Path("save") / "world"
-    if world_root.exists():
-        snapshots = list(world_root.glob("*.json"))
-        if snapshots:
-            return max(snapshots, key=lambda item: item.stat().st_mtime)
+    latest = _latest_json(world_root)
+    if latest:
+        return latest
+    return _latest_json(Path("save"), prefix="world_")
 
-    root = Path("save")
-    if not root.exists():
-        return None
-    snapshots = [
-        path
-        for path in root.glob("*.json")
-        if path.name.startswith("world_")
-    ]
-    if not snapshots:
+
+def _latest_json(folder: Path, prefix: str = "") -> Path | None:
+    latest_path = ""
+    latest_mtime = 0.0
+    try:
+        entries = os.scandir(folder)
+    except FileNotFoundError:
         return None
-    return max(snapshots, key=lambda item: item.stat().st_mtime)
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith(".") or not name.endswith(".json"):
+                continue
+            if not name.startswith(prefix) or not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            if not latest_path or mtime > latest_mtime:
+                latest_path = entry.path
+                latest_mtime = mtime
+    return Path(latest_path) if latest_path else None
 
 
-def summarize_results(title: str, results: List[TestResult]) -> None:
+def _format_rate(title: str, passed: int, total: int) -> str:
+    rate = (passed / total * 100) if total else 0.0
+    return f"\n[{title}] {passed}/{total} ({rate:.1f}%)"
+
+
+def summarize_results(title: str, results: List[TestResult]) -> Tuple[int, int]:
     total = len(results)
     passed = sum(1 for result in results if result.success)
-    rate = (passed / total * 100) if total else 0.0
-    print(f"\n[{title}] {passed}/{total} ({rate:.1f}%)")
+    lines = [_format_rate(title, passed, total)]
     for index, result in enumerate(results, start=1):
-        status = "PASS" if result.success else "FAIL"
-        detail = f" - {result.detail}" if result.detail else ""
-        print(f"{index}. {status}: {result.name}{detail}")
-        if not result.success and result.detail:
-            print(f"   reason: {result.detail}")
-        if not result.success and (result.expected_output or result.actual_output):
+        if result.success:
+            detail = f" - {result.detail}" if result.detail else ""
+            lines.append(f"{index}. PASS: {result.name}{detail}")
+            continue
+        if result.detail:
+            lines.append(f"{index}. FAIL: {result.name} - {result.detail}")
+            lines.append(f"   reason: {result.detail}")
+        else:
+            lines.append(f"{index}. FAIL: {result.name}")
+        if result.expected_output or result.actual_output:
             expected = _snippet(result.expected_output) if result.expected_output else "N/A"
             actual = _snippet(result.actual_output) if result.actual_output else "N/A"
-            print(f"   expected_llm: {expected}")
-            print(f"   actual_llm: {actual}")
+            lines.append(f"   expected_llm: {expected}")
+            lines.append(f"   actual_llm: {actual}")
+    sys.stdout.write("\n".join(lines) + "\n")
+    return passed, total
 
 
-def choose_query_targets(engine: WorldEngine) -> List[Tuple[str, str, str]]:
-    regions = engine.view_children("micro") if "micro" in engine.nodes else []
-    if not regions:
+def build_micro_index(engine: WorldEngine) -> List[MicroAspect]:
+    if "micro" not in engine.nodes:
         return []
+    index: List[MicroAspect] = []
+    for region in engine.view_children("micro"):
+        for polity in engine.view_children(region.identifier):
+            for aspect in engine.view_children(polity.identifier):
+                index.append(
+                    MicroAspect(
+                        region_id=region.identifier,
+                        region_key=region.key,
+                        polity_key=polity.key,
+                        aspect_id=aspect.identifier,
+                        aspect_key=aspect.key,
+                        aspect_value=aspect.value or "",
+                    )
+                )
+    return index
 
+
+def choose_query_targets(micro_index: List[MicroAspect]) -> List[Tuple[str, str, str]]:
     targets: List[Tuple[str, str, str]] = []
-    for region in regions:
-        polities = engine.view_children(region.identifier)
-        if not polities:
-            continue
-        for polity in polities:
-            aspects = engine.view_children(polity.identifier)
-            if not aspects:
-                continue
-            for aspect in aspects:
-                expected = (aspect.value or "").strip()
-                if not expected:
-                    continue
-                query = f"查询{region.key}地区{polity.key}政权的{aspect.key}内容"
-                targets.append((query, expected, aspect.identifier))
-        if targets:
+    region_id = ""
+    for item in micro_index:
+        if targets and item.region_id != region_id:
             break
+        value = item.aspect_value
+        if not value or value.isspace():
+            continue
+        expected = value.strip()
+        region_id = item.region_id
+        query = f"查询{item.region_key}地区{item.polity_key}政权的{item.aspect_key}内容"
+        targets.append((query, expected, item.aspect_id))
 
-    if not targets:
-        return []
-    random.shuffle(targets)
-    return targets[:3]
+    return random.sample(targets, min(3, len(targets)))
 
 
-def pick_random_micro_keys(engine: WorldEngine) -> Tuple[str, str, str] | None:
-    if "micro" not in engine.nodes:
+def _find_child_by_key(parent: WorldNode, key: str) -> WorldNode | None:
+    target = key.strip().lower()
+    if not target:
         return None
-    candidates: List[Tuple[str, str, str]] = []
-    regions = engine.view_children("micro")
-    for region in regions:
-        polities = engine.view_children(region.identifier)
-        if not polities:
+    for child in parent.children.values():
+        if child.key.strip().lower() == target:
+            return child
+    return None
+
+
+def resolve_query_deterministic(engine: WorldEngine, query: str) -> str | None:
+    # Reference lookup for queries built by choose_query_targets; None unless exactly one hit.
+    match = QUERY_PATTERN.fullmatch(query.strip())
+    micro = engine.nodes.get("micro")
+    if not match or not micro:
+        return None
+    region_name = match.group("region").strip().lower()
+    matches: list[str] = []
+    for region in micro.children.values():
+        if region_name not in (region.identifier.lower(), region.key.strip().lower()):
             continue
-        for polity in polities:
-            aspects = engine.view_children(polity.identifier)
-            if not aspects:
-                continue
-            for aspect in aspects:
-                candidates.append((region.key, polity.key, aspect.key))
-    if not candidates:
+        polity = _find_child_by_key(region, match.group("polity"))
+        aspect = _find_child_by_key(polity, match.group("aspect")) if polity else None
+        if aspect:
+            matches.append(aspect.identifier)
+    return matches[0] if len(matches) == 1 else None
+
+
+def pick_random_micro_keys(
+    micro_index: List[MicroAspect],
+) -> Tuple[str, str, str] | None:
+    if not micro_index:
         return None
-    return random.choice(candidates)
+    item = random.choice(micro_index)
+    return item.region_key, item.polity_key, item.aspect_key
 
 
 def run_query_tests(
-    agent: WorldAgent, engine: WorldEngine, recorder: RecordingLLMClient
+    agent: WorldAgent,
+    micro_index: List[MicroAspect],
+    recorder: RecordingLLMClient,
+    use_llm: bool = True,
 ) -> List[TestResult]:
-    results: List[TestResult] = []
-    targets = choose_query_targets(engine)
+    targets = choose_query_targets(micro_index)
     if not targets:
         return [TestResult("query", False, "no_query_targets")]
 
-    for query, expected, expected_id in targets:
+    engine = agent.engine
+    queries = [query for query, _, _ in targets]
+    references = [resolve_query_deterministic(engine, query) for query in queries]
+    # By default every query goes through the agent and is checked against the
+    # reference lookup; with --no-llm-query, resolvable queries skip the LLM.
+    skipped = references if not use_llm else [None] * len(queries)
+    pending = [query for query, identifier in zip(queries, skipped) if not identifier]
+    llm_responses: List[str] = []
+    llm_error = ""
+    cursor = len(recorder.calls)
+    if pending:
         try:
-            response = agent.extract_info(query).strip()
+            llm_responses = agent.extract_info_batch(pending)
         except Exception as exc:
+            llm_error = f"exception: {exc}"
+
+    actual = recorder.last_output_since(
+        "EXTRACT_BATCH", cursor
+    ) or recorder.last_output_since("EXTRACT", cursor)
+    pending_responses = iter(llm_responses)
+    results: List[TestResult] = []
+    for (query, expected, expected_id), reference, skip in zip(
+        targets, references, skipped
+    ):
+        reference_node = engine.nodes.get(reference) if reference else None
+        if reference_node:
+            expected = reference_node.value.strip()
+            expected_id = reference_node.identifier
+        if skip:
+            response = expected
+            case_actual = f"resolved without LLM: {skip}"
+        elif llm_error:
             results.append(
                 TestResult(
                     query,
                     False,
-                    f"exception: {exc}",
+                    llm_error,
                     expected_output=expected_id,
-                    actual_output=recorder.last_output("EXTRACT"),
+                    actual_output=actual,
                 )
             )
             continue
+        else:
+            response = next(pending_responses, "").strip()
+            case_actual = actual
         success = bool(response and response == expected)
         if success:
-            detail = "matched"
+            detail = "matched" if not skip else "resolved"
         else:
-            resp_snip = response[:80].replace("\n", " ") if response else ""
-            exp_snip = expected[:80].replace("\n", " ") if expected else ""
+            resp_snip = response[:80].translate(_SNIPPET_TABLE)
+            exp_snip = expected[:80].translate(_SNIPPET_TABLE)
             detail = (
                 "mismatch "
                 f"(expected_len={len(expected)}, got_len={len(response)}) "
@@ -208,43 +399,59 @@ def run_query_tests(
                 success,
                 detail,
                 expected_output=expected_id,
-                actual_output=recorder.last_output("EXTRACT"),
+                actual_output=case_actual,
             )
         )
     return results
 
 
 def run_add_tests(
-    agent: WorldAgent, engine: WorldEngine, recorder: RecordingLLMClient
+    agent: WorldAgent,
+    engine: WorldEngine,
+    micro_index: List[MicroAspect],
+    recorder: RecordingLLMClient,
 ) -> List[TestResult]:
     results: List[TestResult] = []
     if "micro" not in engine.nodes:
         return [TestResult("add", False, "missing_micro_root")]
-    existing_ids = set(engine.nodes)
-    for index in range(1, 4):
-        context = pick_random_micro_keys(engine)
-        if not context:
-            results.append(
-                TestResult(
-                    f"add-{index}",
-                    False,
-                    "missing_micro_keys",
-                    expected_output="<|KEY|>:<name>\\n<|VALUE|>:<content>",
-                    actual_output="N/A",
-                )
-            )
-            continue
-        region_key, polity_key, _ = context
-        org_name = random.choice(ORG_NAMES)
-        update_info = f"{region_key}地区{polity_key}政权新增了{org_name}机构"
-        try:
-            node = agent.apply_update(
-                ADD_TAG,
-                "micro",
-                update_info,
+    if not micro_index:
+        return [
+            TestResult(
+                f"add-{index}",
+                False,
+                "missing_micro_keys",
+                expected_output="<|KEY|>:<name>\\n<|VALUE|>:<content>",
+                actual_output="N/A",
             )
-        except Exception as exc:
-            results.append(TestResult(f"add-{index}", False, f"exception: {exc}"))
+            for index in range(1, 4)
+        ]
+
+    cases: List[Tuple[str, str, str]] = []
+    for _ in range(3):
+        region_key, polity_key, _aspect_key = pick_random_micro_keys(micro_index)
+        cases.append((region_key, polity_key, random.choice(ORG_NAMES)))
+    update_infos = [
+        f"{region_key}地区{polity_key}政权新增了{org_name}机构"
+        for region_key, polity_key, org_name in cases
+    ]
+    existing_ids = set(engine.nodes)
+    cursor = len(recorder.calls)
+    try:
+        nodes = agent.apply_update_batch(ADD_TAG, "micro", update_infos)
+    except Exception as exc:
+        return [
+            TestResult(f"add-{index}", False, f"exception: {exc}")
+            for index in range(1, len(cases) + 1)
+        ]
+
+    actual = recorder.last_output_since(
+        "ADD_NODE_BATCH", cursor
+    ) or recorder.last_output_since("ADD_NODE", cursor)
+    for index, ((region_key, polity_key, org_name), node) in enumerate(
+        zip(cases, nodes), start=1
+    ):
+        if isinstance(node, Exception):
+            results.append(TestResult(f"add-{index}", False, f"exception: {node}"))
             continue
         is_new = node.identifier not in existing_ids
         has_value = bool(node.value.strip())
@@ -265,7 +472,7 @@ def run_add_tests(
                 success,
                 detail,
                 expected_output="<|KEY|>:<name>\\n<|VALUE|>:<content>",
-                actual_output=recorder.last_output("ADD_NODE"),
+                actual_output=actual,
             )
         )
     return results
@@ -326,7 +533,7 @@ def run_polity_tests(agent: WorldAgent, engine: WorldEngine) -> List[TestResult]
     removed_ids = set(removed)
     expected_removed = expected_ids | {polity.identifier}
     missing_removed = expected_removed - removed_ids
-    still_present = any(node_id in engine.nodes for node_id in expected_removed)
+    still_present = bool(expected_removed & engine.nodes.keys())
     parent_has_child = polity.identifier in region.children
     success = not missing_removed and not still_present and not parent_has_child
     detail = (
@@ -338,21 +545,46 @@ def run_polity_tests(agent: WorldAgent, engine: WorldEngine) -> List[TestResult]
 
 
 def run_update_tests(
-    agent: WorldAgent, engine: WorldEngine, recorder: RecordingLLMClient
+    agent: WorldAgent,
+    engine: WorldEngine,
+    micro_index: List[MicroAspect],
+    recorder: RecordingLLMClient,
 ) -> List[TestResult]:
     results: List[TestResult] = []
-    updatable = [
-        node
+    has_updatable = any(
+        node.value and not node.value.isspace()
         for node in engine.nodes.values()
-        if node.identifier not in {"world", "macro", "micro"} and node.value.strip()
-    ]
-    if not updatable:
+        if node.identifier not in _ROOT_IDS
+    )
+    if not has_updatable:
         return [TestResult("update", False, "no_updatable_nodes")]
 
-    random.shuffle(updatable)
-    for index in range(1, 4):
-        context = pick_random_micro_keys(engine)
+    cases: List[Tuple[str, str, str, str, str] | None] = []
+    for _ in range(3):
+        context = pick_random_micro_keys(micro_index)
         if not context:
+            cases.append(None)
+            continue
+        region_key, polity_key, aspect_key = context
+        change = random.choice(CHANGES)
+        update_info = f"{region_key}地区{polity_key}政权的{aspect_key}机构发生了{change}"
+        cases.append((region_key, polity_key, aspect_key, change, update_info))
+
+    # Decisions only read the tree, so they can overlap when no two cases touch the
+    # same polity. Otherwise an earlier update may rename what a later decision sees,
+    # so each decision runs after the previous update, as before.
+    live = [case for case in cases if case]
+    decided: dict[int, Future] = {}
+    if len(live) > 1 and len({case[:2] for case in live}) == len(live):
+        with ThreadPoolExecutor(max_workers=len(live)) as executor:
+            decided = {
+                index: executor.submit(agent.decide_action, case[4])
+                for index, case in enumerate(cases, start=1)
+                if case
+            }
+
+    for index, case in enumerate(cases, start=1):
+        if not case:
             results.append(
                 TestResult(
                     f"update-{index}",
@@ -363,16 +595,14 @@ def run_update_tests(
                 )
             )
             continue
-        region_key, polity_key, aspect_key = context
-        change = random.choice(CHANGES)
-        update_info = f"{region_key}地区{polity_key}政权的{aspect_key}机构发生了{change}"
+        region_key, polity_key, aspect_key, change, update_info = case
+        cursor = len(recorder.calls)
         try:
-            decision = agent.decide_action(update_info)
-            node = agent.apply_update(
-                decision.flag,
-                decision.index,
-                f"{region_key}地区{polity_key}政权的{aspect_key}机构发生了{change}",
-            )
+            if index in decided:
+                decision = decided[index].result()
+            else:
+                decision = agent.decide_action(update_info)
+            node = agent.apply_update(decision.flag, decision.index, update_info)
         except Exception as exc:
             results.append(
                 TestResult(
@@ -380,7 +610,7 @@ def run_update_tests(
                     False,
                     f"exception: {exc}",
                     expected_output="non-empty updated content",
-                    actual_output=recorder.last_output("UPDATE_NODE"),
+                    actual_output=recorder.last_output_since("UPDATE_NODE", cursor),
                 )
             )
             continue
@@ -402,17 +632,21 @@ def run_update_tests(
                 success,
                 detail,
                 expected_output="non-empty updated content",
-                actual_output=recorder.last_output("UPDATE_NODE"),
+                actual_output=recorder.last_output_since("UPDATE_NODE", cursor),
             )
         )
     return results
 
 
-def run_demo() -> None:
+def run_demo(reproducible: bool = True, query_llm: bool = True) -> None:
     snapshot = find_latest_snapshot()
     if not snapshot:
         print("未找到现有存档，请先生成世界快照。")
         return
+    if reproducible:
+        # Same snapshot, same picks: keeps LLM cache hits stable between runs.
+        digest = hashlib.sha256(str(snapshot).encode("utf-8")).hexdigest()
+        random.seed(int(digest[:8], 16))
 
     recorder = RecordingLLMClient(LLMClient())
     engine = WorldEngine.from_snapshot(snapshot, llm_client=recorder)
@@ -420,19 +654,27 @@ def run_demo() -> None:
 
     print(f"使用存档：{snapshot}")
 
-    query_results = run_query_tests(agent, engine, recorder)
-    add_results = run_add_tests(agent, engine, recorder)
+    micro_index = build_micro_index(engine)
+    query_results = run_query_tests(agent, micro_index, recorder, use_llm=query_llm)
+    add_results = run_add_tests(agent, engine, micro_index, recorder)
     polity_results = run_polity_tests(agent, engine)
-    update_results = run_update_tests(agent, engine, recorder)
-
-    summarize_results("查询测试", query_results)
-    summarize_results("新增测试", add_results)
-    summarize_results("政权增删测试", polity_results)
-    summarize_results("更新测试", update_results)
-
-    overall = query_results + add_results + polity_results + update_results
-    summarize_results("总体成功率", overall)
+    # Add and polity tests reshape the micro tree, so index it again for updates.
+    micro_index = build_micro_index(engine)
+    update_results = run_update_tests(agent, engine, micro_index, recorder)
+
+    passed = total = 0
+    for title, results in (
+        ("查询测试", query_results),
+        ("新增测试", add_results),
+        ("政权增删测试", polity_results),
+        ("更新测试", update_results),
+    ):
+        phase_passed, phase_total = summarize_results(title, results)
+        passed += phase_passed
+        total += phase_total
+    sys.stdout.write(_format_rate("总体成功率", passed, total) + "\n")
 
 
 if __name__ == "__main__":
-    run_demo()
+    args = sys.argv[1:]
+    run_demo(reproducible="--random" not in args, query_llm=NO_LLM_QUERY_FLAG not in args)
@@ -146,11 +146,27 @@ const AgentTestView = (() => {
       const response = await fetch("/api/game/plan", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ text, apply: true }),
+        body: JSON.stringify({ text, apply: true, stream: true }),
       });
-      const data = await response.json();
-      if (!data.ok) {
-        throw new Error(data.error || "请求失败");
+      const contentType = response.headers.get("Content-Type") || "";
+      let data = null;
+      if (contentType.startsWith("text/event-stream")) {
+        let actionCount = 0;
+        await readEventStream(response, (event, payload) => {
+          if (event === "decision") {
+            setStatus("已完成决策，正在生成操作...", false);
+          } else if (event === "action") {
+            actionCount += 1;
+            setStatus(`已生成 ${actionCount} 个操作...`, false);
+          } else if (event === "done" || event === "error") {
+            data = payload;
+          }
+        });
+      } else {
+        data = await response.json();
+      }
+      if (!data || !data.ok) {
+        throw new Error((data && data.error) || "请求失败");
       }
       renderEntry(data, text);
       updateContext(data.context);
@@ -170,6 +186,37 @@ const AgentTestView = (() => {
     }
   }
 
+  async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) {
+        break;
+      }
+      buffer += decoder.decode(value, { stream: true });
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = "message";
+        const dataLines = [];
+        block.split("\n").forEach((line) => {
+          if (line.startsWith("event:")) {
+            event = line.slice(6).trim();
+          } else if (line.startsWith("data:")) {
+            dataLines.push(line.slice(5).trim());
+          }
+        });
+        if (dataLines.length) {
+          onEvent(event, JSON.parse(dataLines.join("\n")));
+        }
+        boundary = buffer.indexOf("\n\n");
+      }
+    }
+  }
+
   function clearLog() {
     runCount = 0;
     if (elements.list) {
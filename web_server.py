@@ -1,22 +1,28 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
 import threading
 import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 from urllib.parse import parse_qs, urlparse
 
 from character.character_agent import CharacterAgent
 from character.character_engine import CharacterEngine, CharacterRecord, CharacterRequest
-from game.game_agent import GameAgent
+from game.game_agent import GameAgent, GameUpdateDecision
 from game.history_engine import HistoryEngine
-from llm_api.llm_client import LLMClient
+from llm_api.llm_client import LLM_ERROR_PREFIX, LLMClient
 from world.world_agent import WorldAgent
 from world.world_engine import WorldEngine, WorldNode
 
@@ -26,6 +32,20 @@ SAVE_ROOT = BASE_DIR / "save"
 HISTORY_SAVE_ROOT = SAVE_ROOT / "history"
 WORLD_SPEC = BASE_DIR / "world" / "world_spec.md"
 DEFAULT_LOG_PATH = Path("log") / "web_server.log"
+MAX_REQUEST_BODY = 32 * 1024 * 1024
+DECISION_CACHE_SIZE = 256
+DECISION_CACHE_TTL = 300.0
+PROGRESS_MIN_STEP = 10
+PROGRESS_MIN_INTERVAL = 0.1
+SNAPSHOT_LIST_TTL = 2.0
+WORLD_SNAPSHOT_FOLDERS = (SAVE_ROOT, SAVE_ROOT / "world")
+CHARACTER_SNAPSHOT_FOLDERS = (SAVE_ROOT / "characters", SAVE_ROOT)
+
+_SNAPSHOT_LIST_LOCK = threading.Lock()
+_SNAPSHOT_LIST_CACHE: Dict[
+    str, tuple[tuple[int, ...], float, list[Dict[str, Any]]]
+] = {}
+_SNAPSHOT_LIST_GENERATION = 0
 
 
 def _get_logger() -> logging.Logger:
@@ -39,7 +59,13 @@ def _get_logger() -> logging.Logger:
         "%(asctime)s %(levelname)s %(name)s %(filename)s:%(lineno)d %(message)s"
     )
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    # Request threads only enqueue records; the file write happens on the
+    # listener thread so a burst of failures does not queue up on disk I/O.
+    log_queue: queue.Queue = queue.Queue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     logger.propagate = False
     return logger
 
@@ -54,112 +80,290 @@ LOGGER = _get_logger()
 
 
 def _sanitize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
-    sanitized: Dict[str, Any] = {}
-    for key, value in payload.items():
-        if isinstance(value, str):
-            sanitized[key] = _truncate_text(value)
-        else:
-            sanitized[key] = value
-    return sanitized
+    return {
+        key: _truncate_text(value) if isinstance(value, str) else value
+        for key, value in payload.items()
+    }
 
 
 def _timestamp() -> str:
-    return datetime.now().strftime("%Y%m%d_%H%M%S")
+    return time.strftime("%Y%m%d_%H%M%S")
+
+
+# Unicode \w is exactly isalnum() plus "_", so this keeps the same characters.
+_FILENAME_UNSAFE = re.compile(r"[^\w.-]")
 
 
 def _sanitize_filename(name: str) -> str:
-    cleaned = "".join(ch if ch.isalnum() or ch in {"-", "_", "."} else "_" for ch in name)
+    cleaned = _FILENAME_UNSAFE.sub("_", name)
     return cleaned.strip("._") or "imported"
 
 
-def _write_snapshot(snapshot: Dict[str, Dict[str, Any]], path: Path) -> None:
+_LLM_CLIENT_LOCK = threading.Lock()
+_LLM_CLIENT: Optional[LLMClient] = None
+_SPEC_TEXT_CACHE: Dict[Path, tuple[int, str]] = {}
+_PLAN_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="game-plan")
+_DECISION_CACHE_LOCK = threading.Lock()
+_DECISION_CACHE: OrderedDict[tuple, tuple[float, GameUpdateDecision]] = OrderedDict()
+
+
+def _get_llm_client() -> LLMClient:
+    # One client per process so every request reuses the same HTTP connection pool.
+    global _LLM_CLIENT
+    with _LLM_CLIENT_LOCK:
+        if _LLM_CLIENT is None:
+            _LLM_CLIENT = LLMClient()
+        return _LLM_CLIENT
+
+
+def _collect_agent_actions(agent: Any, text: str) -> list:
+    if hasattr(agent, "collect_actions"):
+        return agent.collect_actions(text)
+    return agent.decide_actions(text)
+
+
+def _current_revisions() -> tuple[int, int]:
+    with STATE.lock:
+        return STATE.world_revision, STATE.character_revision
+
+
+def _cached_decide_updates(
+    game_agent: GameAgent, text: str, revisions: tuple[int, int], paths: tuple
+) -> GameUpdateDecision:
+    # revisions/paths pin the world/character state the decision was read against;
+    # the TTL bounds drift from files edited outside this server.
+    key = (revisions, paths, text)
+    now = time.monotonic()
+    with _DECISION_CACHE_LOCK:
+        cached = _DECISION_CACHE.get(key)
+        if cached and now - cached[0] < DECISION_CACHE_TTL:
+            _DECISION_CACHE.move_to_end(key)
+            return cached[1]
+    decision = game_agent.decide_updates(text)
+    if decision.raw.startswith(LLM_ERROR_PREFIX):
+        return decision
+    if _current_revisions() != revisions:
+        # State moved while the LLM was deciding; the answer may mix old and new.
+        return decision
+    with _DECISION_CACHE_LOCK:
+        _DECISION_CACHE[key] = (now, decision)
+        _DECISION_CACHE.move_to_end(key)
+        while len(_DECISION_CACHE) > DECISION_CACHE_SIZE:
+            _DECISION_CACHE.popitem(last=False)
+    return decision
+
+
+def _load_world_spec_text(path: Path) -> Optional[str]:
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _SPEC_TEXT_CACHE.get(path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    text = path.read_text(encoding="utf-8")
+    _SPEC_TEXT_CACHE[path] = (mtime_ns, text)
+    return text
+
+
+# json.dumps builds a new JSONEncoder for every call with non-default options;
+# one shared instance is stateless between encode() calls and safe across threads.
+_COMPACT_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _encode_snapshot(snapshot: Dict[str, Dict[str, Any]]) -> bytes:
+    return _COMPACT_JSON.encode(snapshot).encode("utf-8")
+
+
+def _write_snapshot(snapshot: Dict[str, Dict[str, Any]], path: Path) -> bytes:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(
-        json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")),
-        encoding="utf-8",
-    )
+    data = _encode_snapshot(snapshot)
+    path.write_bytes(data)
+    return data
+
+
+_SNAPSHOT_WRITES: "queue.Queue[tuple[Path, bytes]]" = queue.Queue()
+# Last failure per path, cleared by the next successful write of that path.
+_SNAPSHOT_WRITE_ERRORS: Dict[Path, str] = {}
+_SNAPSHOT_WRITE_ERRORS_LOCK = threading.Lock()
+
+
+def _snapshot_writer() -> None:
+    while True:
+        # Coalesce a burst of edits so each file is written once with its latest bytes.
+        path, data = _SNAPSHOT_WRITES.get()
+        pending = {path: data}
+        taken = 1
+        while True:
+            try:
+                path, data = _SNAPSHOT_WRITES.get_nowait()
+            except queue.Empty:
+                break
+            pending[path] = data
+            taken += 1
+        for path, data in pending.items():
+            # Write beside the target and swap it in so readers never see a partial file.
+            temp_path = path.with_name(f"{path.name}.tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path.write_bytes(data)
+                os.replace(temp_path, path)
+            except Exception as exc:
+                LOGGER.exception("snapshot write failed path=%s", path)
+                with _SNAPSHOT_WRITE_ERRORS_LOCK:
+                    _SNAPSHOT_WRITE_ERRORS[path] = f"{type(exc).__name__}: {exc}"
+                continue
+            with _SNAPSHOT_WRITE_ERRORS_LOCK:
+                _SNAPSHOT_WRITE_ERRORS.pop(path, None)
+        _invalidate_snapshot_lists()
+        for _ in range(taken):
+            _SNAPSHOT_WRITES.task_done()
+
+
+def _queue_snapshot_write(snapshot: Dict[str, Dict[str, Any]], path: Path) -> bytes:
+    data = _encode_snapshot(snapshot)
+    _SNAPSHOT_WRITES.put((path, data))
+    return data
+
+
+def _flush_snapshot_writes(path: Optional[Path] = None) -> Optional[str]:
+    # Waits for queued writes; with a path, also reports that path's last write error.
+    _SNAPSHOT_WRITES.join()
+    if path is None:
+        return None
+    with _SNAPSHOT_WRITE_ERRORS_LOCK:
+        return _SNAPSHOT_WRITE_ERRORS.get(path)
+
+
+threading.Thread(target=_snapshot_writer, name="snapshot-writer", daemon=True).start()
 
 
 def _normalize_snapshot(payload: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     snapshot: Dict[str, Dict[str, Any]] = {}
+    has_children_lists = True
     for identifier, node in payload.items():
         if not isinstance(node, dict):
             continue
+        children = node.get("children", [])
+        if not isinstance(children, list):
+            has_children_lists = False
         snapshot[identifier] = {
             "key": node.get("key", node.get("title", identifier)),
             "value": node.get("value", ""),
-            "children": node.get("children", []),
+            "children": children,
         }
 
-    has_children_lists = all(
-        isinstance(node.get("children"), list) for node in snapshot.values()
-    )
-    if not has_children_lists:
-        derived: Dict[str, list[str]] = {key: [] for key in snapshot}
-        for identifier in snapshot:
-            if identifier == "world":
-                continue
-            if "." in identifier:
-                parent = identifier.rsplit(".", 1)[0]
-            elif identifier in {"macro", "micro"}:
-                parent = "world"
-            else:
-                parent = "macro"
-            if parent in derived:
-                derived[parent].append(identifier)
-        for identifier, node in snapshot.items():
-            node["children"] = sorted(derived.get(identifier, []))
-    else:
+    if has_children_lists:
         for node in snapshot.values():
-            node["children"] = sorted(node.get("children", []))
+            node["children"].sort()
+        return snapshot
 
+    derived: Dict[str, list[str]] = {}
+    for identifier in snapshot:
+        if identifier == "world":
+            continue
+        if "." in identifier:
+            parent = identifier.rpartition(".")[0]
+        elif identifier in {"macro", "micro"}:
+            parent = "world"
+        else:
+            parent = "macro"
+        if parent in snapshot:
+            derived.setdefault(parent, []).append(identifier)
+    for identifier, node in snapshot.items():
+        children = derived.get(identifier)
+        if children:
+            children.sort()
+            node["children"] = children
+        else:
+            node["children"] = []
     return snapshot
 
 
-def _list_world_snapshots() -> list[Dict[str, Any]]:
-    snapshots: list[Dict[str, Any]] = []
-    folders = [SAVE_ROOT, SAVE_ROOT / "world"]
+def _invalidate_snapshot_lists() -> None:
+    global _SNAPSHOT_LIST_GENERATION
+    with _SNAPSHOT_LIST_LOCK:
+        _SNAPSHOT_LIST_GENERATION += 1
+
+
+def _cached_snapshot_list(
+    kind: str,
+    folders: tuple[Path, ...],
+    scan: Callable[[], list[Dict[str, Any]]],
+) -> list[Dict[str, Any]]:
+    # Directory mtimes change when snapshots are added or removed; in-place
+    # rewrites from this server bump the generation instead. The TTL catches
+    # what neither sees: external rewrites (which reorder by file mtime) and
+    # adds that land within the filesystem's mtime granularity.
+    now = time.monotonic()
+    with _SNAPSHOT_LIST_LOCK:
+        signature = [_SNAPSHOT_LIST_GENERATION]
+        cached = _SNAPSHOT_LIST_CACHE.get(kind)
     for folder in folders:
-        if not folder.exists():
-            continue
-        for path in folder.glob("*.json"):
-            try:
-                rel_path = path.relative_to(SAVE_ROOT)
-            except ValueError:
-                rel_path = path.name
-            snapshots.append(
+        try:
+            signature.append(folder.stat().st_mtime_ns)
+        except FileNotFoundError:
+            signature.append(-1)
+    key = tuple(signature)
+    if cached and cached[0] == key and now - cached[1] < SNAPSHOT_LIST_TTL:
+        return list(cached[2])
+    snapshots = scan()
+    with _SNAPSHOT_LIST_LOCK:
+        _SNAPSHOT_LIST_CACHE[kind] = (key, now, snapshots)
+    return list(snapshots)
+
+
+def _list_world_snapshots() -> list[Dict[str, Any]]:
+    return _cached_snapshot_list("world", WORLD_SNAPSHOT_FOLDERS, _scan_world_snapshots)
+
+
+def _list_character_snapshots() -> list[Dict[str, Any]]:
+    return _cached_snapshot_list(
+        "characters", CHARACTER_SNAPSHOT_FOLDERS, _scan_character_snapshots
+    )
+
+
+def _scan_json_files(folder: Path, prefix: str = "") -> list[Dict[str, Any]]:
+    try:
+        rel_root = folder.relative_to(SAVE_ROOT)
+    except ValueError:
+        rel_root = Path()
+    items: list[Dict[str, Any]] = []
+    try:
+        entries = os.scandir(folder)
+    except FileNotFoundError:
+        return items
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith(".") or not name.endswith(".json"):
+                continue
+            if not name.startswith(prefix) or not entry.is_file():
+                continue
+            items.append(
                 {
-                    "name": path.name,
-                    "path": str(rel_path),
-                    "full_path": str(path),
-                    "mtime": path.stat().st_mtime,
+                    "name": name,
+                    "path": str(rel_root / name),
+                    "full_path": entry.path,
+                    "mtime": entry.stat().st_mtime,
                 }
             )
+    return items
+
+
+def _scan_world_snapshots() -> list[Dict[str, Any]]:
+    snapshots: list[Dict[str, Any]] = []
+    for folder in WORLD_SNAPSHOT_FOLDERS:
+        snapshots.extend(_scan_json_files(folder))
     snapshots.sort(key=lambda item: item.get("mtime", 0), reverse=True)
     return snapshots
 
 
-def _list_character_snapshots() -> list[Dict[str, Any]]:
+def _scan_character_snapshots() -> list[Dict[str, Any]]:
     snapshots: list[Dict[str, Any]] = []
-    folders = [SAVE_ROOT / "characters", SAVE_ROOT]
-    for folder in folders:
-        if not folder.exists():
-            continue
-        for path in folder.glob("*.json"):
-            if folder == SAVE_ROOT and not path.name.startswith("characters_"):
-                continue
-            try:
-                rel_path = path.relative_to(SAVE_ROOT)
-            except ValueError:
-                rel_path = path.name
-            snapshots.append(
-                {
-                    "name": path.name,
-                    "path": str(rel_path),
-                    "full_path": str(path),
-                    "mtime": path.stat().st_mtime,
-                }
-            )
+    for folder in CHARACTER_SNAPSHOT_FOLDERS:
+        prefix = "characters_" if folder == SAVE_ROOT else ""
+        snapshots.extend(_scan_json_files(folder, prefix))
     snapshots.sort(key=lambda item: item.get("mtime", 0), reverse=True)
     return snapshots
 
@@ -184,6 +388,7 @@ def _format_save_path(path: Optional[Path]) -> str:
 
 
 def _mark_world_updated(save_path: Optional[Path]) -> None:
+    _invalidate_snapshot_lists()
     STATE.world_revision += 1
     STATE.world_updated_at = time.time()
     if save_path:
@@ -191,34 +396,40 @@ def _mark_world_updated(save_path: Optional[Path]) -> None:
 
 
 def _mark_character_updated(save_path: Optional[Path]) -> None:
+    _invalidate_snapshot_lists()
     STATE.character_revision += 1
     STATE.character_updated_at = time.time()
     if save_path:
         STATE.last_character_save = save_path
 
 
-def _load_world_snapshot() -> tuple[Optional[Dict[str, Dict[str, Any]]], Optional[Path]]:
+def _load_world_snapshot() -> tuple[
+    Optional[Dict[str, Dict[str, Any]]], Optional[Path], tuple[int, int]
+]:
+    # Revisions are read in the same critical section as the snapshot so callers
+    # can key caches on exactly the state they loaded.
     with STATE.lock:
         snapshot = STATE.snapshot
         save_path = STATE.current_save
+        revisions = (STATE.world_revision, STATE.character_revision)
     if snapshot:
-        return snapshot, save_path
+        return snapshot, save_path, revisions
 
     latest = next(
         (item for item in _list_world_snapshots() if _resolve_snapshot_item_path(item)),
         None,
     )
     if not latest:
-        return None, None
+        return None, None, revisions
     path = _resolve_snapshot_item_path(latest)
     if not path:
-        return None, None
+        return None, None, revisions
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = json.loads(path.read_bytes())
     except Exception:
         LOGGER.exception("load_world_snapshot failed path=%s", path)
-        return None, path
-    return payload, path
+        return None, path, revisions
+    return payload, path, revisions
 
 
 def _load_character_snapshot(
@@ -226,7 +437,7 @@ def _load_character_snapshot(
 ) -> tuple[list[CharacterRecord], Dict[str, Any]]:
     if not snapshot_path or not snapshot_path.exists():
         return [], {}
-    payload = json.loads(snapshot_path.read_text(encoding="utf-8"))
+    payload = json.loads(snapshot_path.read_bytes())
     records: list[CharacterRecord] = []
     for item in payload.get("characters", []):
         identifier = str(item.get("id", "")).strip()
@@ -243,8 +454,20 @@ def _load_character_snapshot(
     return records, payload
 
 
+_ACTION_NAMES = {
+    "<|ADD_NODE|>": "ADD_NODE",
+    "<|UPDATE_NODE|>": "UPDATE_NODE",
+    "<|REMOVE_NODE|>": "REMOVE_NODE",
+    "<|ADD_CHARACTER|>": "ADD_CHARACTER",
+    "<|UPDATE_CHARACTER|>": "UPDATE_CHARACTER",
+}
+
+
 def _normalize_action_name(flag: str) -> str:
     cleaned = flag.strip()
+    known = _ACTION_NAMES.get(cleaned)
+    if known:
+        return known
     if "ADD_NODE" in cleaned:
         return "ADD_NODE"
     if "UPDATE_NODE" in cleaned:
@@ -256,6 +479,12 @@ def _normalize_action_name(flag: str) -> str:
     return cleaned.strip("<|>").strip()
 
 
+def _character_label(record: Optional[CharacterRecord]) -> str:
+    if record and isinstance(record.profile, dict):
+        return str(record.profile.get("name", "")).strip()
+    return ""
+
+
 def _coerce_bool(value: Any, default: bool = False) -> bool:
     if value is None:
         return default
@@ -304,10 +533,61 @@ class GenerationJob:
     ready: bool = False
 
 
+class ProgressThrottle:
+    # Holds back progress writes closer than PROGRESS_MIN_STEP/INTERVAL to the
+    # last one, then writes the newest held value once the interval expires so
+    # a slow stretch after a burst never leaves the job showing stale progress.
+
+    def __init__(self, apply: Callable[[int, int], None]) -> None:
+        self._apply = apply
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+        self._last_completed = 0
+        self._pending: Optional[tuple[int, int]] = None
+        self._timer: Optional[threading.Timer] = None
+
+    def __call__(self, completed: int, total: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if (
+                completed < total
+                and completed - self._last_completed < PROGRESS_MIN_STEP
+                and now - self._last_emit < PROGRESS_MIN_INTERVAL
+            ):
+                self._pending = (completed, total)
+                if self._timer is None:
+                    delay = PROGRESS_MIN_INTERVAL - (now - self._last_emit)
+                    self._timer = threading.Timer(delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            self._pending = None
+            self._emit(now, completed, total)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, None
+            if pending is not None:
+                self._emit(time.monotonic(), *pending)
+
+    def _emit(self, now: float, completed: int, total: int) -> None:
+        # Called with _lock held so a timer flush cannot overwrite a newer value.
+        self._last_emit = now
+        self._last_completed = completed
+        self._apply(completed, total)
+
+
 class AppState:
     def __init__(self) -> None:
+        # lock guards the world snapshot, save paths and revisions; jobs_lock
+        # guards generation jobs so progress ticks never wait on snapshot writes.
         self.lock = threading.Lock()
+        self.jobs_lock = threading.Lock()
         self.snapshot: Optional[Dict[str, Dict[str, Any]]] = None
+        self.snapshot_data: Optional[bytes] = None
         self.current_save: Optional[Path] = None
         self.jobs: Dict[str, GenerationJob] = {}
         self.world_job_id: Optional[str] = None
@@ -316,6 +596,7 @@ class AppState:
         self.world_updated_at: float = 0.0
         self.character_updated_at: float = 0.0
         self.last_character_save: Optional[Path] = None
+        self.updates_data: Optional[tuple[tuple[int, int], bytes]] = None
 
 
 STATE = AppState()
@@ -323,20 +604,44 @@ STATE = AppState()
 
 class RequestHandler(SimpleHTTPRequestHandler):
     logger = LOGGER
+    _GET_ROUTES = {
+        "/api/world": "_api_world",
+        "/api/world/status": "_api_world_status",
+        "/api/updates": "_api_updates",
+        "/api/world/snapshots": "_api_world_snapshots",
+        "/api/characters/snapshots": "_api_character_snapshots",
+        "/api/characters": "_api_characters",
+        "/api/progress": "_api_progress",
+    }
+    _POST_ROUTES = {
+        "/api/generate": "_handle_generate",
+        "/api/import": "_handle_import",
+        "/api/update": "_handle_update",
+        "/api/characters/generate": "_handle_character_generate",
+        "/api/game/plan": "_handle_game_plan",
+    }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(WEB_ROOT), **kwargs)
         self.logger = LOGGER
         self._request_payload: Optional[Dict[str, Any]] = None
-        self._request_raw: str = ""
+        self._request_raw: bytes = b""
         self._request_error_detail: str = ""
 
     def log_message(self, format: str, *args) -> None:
         return
 
+    def copyfile(self, source, outputfile) -> None:
+        # wfile is unbuffered, so static files can go straight to the socket;
+        # socket.sendfile uses os.sendfile and falls back to send() itself.
+        if outputfile is self.wfile and self.wbufsize == 0:
+            self.connection.sendfile(source)
+            return
+        super().copyfile(source, outputfile)
+
     def _reset_request_context(self) -> None:
         self._request_payload = None
-        self._request_raw = ""
+        self._request_raw = b""
         self._request_error_detail = ""
 
     def _build_request_context(self) -> Dict[str, Any]:
@@ -356,7 +661,9 @@ class RequestHandler(SimpleHTTPRequestHandler):
         if self._request_payload is not None:
             context["request_payload"] = _sanitize_payload(self._request_payload)
         elif self._request_raw:
-            context["request_raw"] = _truncate_text(self._request_raw)
+            # Only decoded here, when a failed request is actually being logged.
+            raw_text = self._request_raw.decode("utf-8", errors="replace")
+            context["request_raw"] = _truncate_text(raw_text)
         return context
 
     def _log_api_error(self, payload: Dict[str, Any], status: int) -> None:
@@ -416,38 +723,61 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     return
 
     def _handle_api_get(self, parsed) -> None:
-        if parsed.path == "/api/world":
-            with STATE.lock:
-                snapshot = STATE.snapshot
-                save_path = str(STATE.current_save) if STATE.current_save else None
-            if not snapshot:
-                self._send_json({"ok": False, "error": "no_snapshot"}, status=404)
-                return
+        handler = self._GET_ROUTES.get(parsed.path)
+        if handler is None:
+            self.send_error(404, "Not found")
+            return
+        getattr(self, handler)(parsed)
+
+    def _api_world(self, parsed) -> None:
+        with STATE.lock:
+            snapshot = STATE.snapshot
+            snapshot_data = STATE.snapshot_data
+            save_path = str(STATE.current_save) if STATE.current_save else None
+        if not snapshot:
+            self._send_json({"ok": False, "error": "no_snapshot"}, status=404)
+            return
+        if snapshot_data is None:
             self._send_json({"ok": True, "snapshot": snapshot, "save_path": save_path})
             return
-        if parsed.path == "/api/world/status":
-            with STATE.lock:
-                job_id = STATE.world_job_id
-                job = STATE.jobs.get(job_id) if job_id else None
-            if not job:
-                self._send_json({"ok": True, "status": "idle"})
-                return
-            payload = {
-                "ok": True,
-                "status": job.status,
-                "message": job.message,
-                "save_path": job.save_path,
-                "phase": job.phase,
-                "macro_total": job.macro_total,
-                "micro_total": job.micro_total,
-                "stage_completed": job.stage_completed,
-                "stage_total": job.stage_total,
-                "ready": job.ready,
-            }
-            self._send_json(payload)
+        # Reuse the bytes written to disk instead of serializing the snapshot again.
+        suffix = json.dumps(save_path, ensure_ascii=False)
+        self._send_body(
+            b'{"ok":true,"snapshot":',
+            snapshot_data,
+            f',"save_path":{suffix}}}'.encode("utf-8"),
+        )
+
+    def _api_world_status(self, parsed) -> None:
+        with STATE.jobs_lock:
+            job_id = STATE.world_job_id
+            job = STATE.jobs.get(job_id) if job_id else None
+        if not job:
+            self._send_json({"ok": True, "status": "idle"})
             return
-        if parsed.path == "/api/updates":
-            with STATE.lock:
+        payload = {
+            "ok": True,
+            "status": job.status,
+            "message": job.message,
+            "save_path": job.save_path,
+            "phase": job.phase,
+            "macro_total": job.macro_total,
+            "micro_total": job.micro_total,
+            "stage_completed": job.stage_completed,
+            "stage_total": job.stage_total,
+            "ready": job.ready,
+        }
+        self._send_json(payload)
+
+    def _api_updates(self, parsed) -> None:
+        # Every field below changes together with a revision bump, so the encoded
+        # body can be reused until one of the revisions moves.
+        with STATE.lock:
+            revisions = (STATE.world_revision, STATE.character_revision)
+            cached = STATE.updates_data
+            if cached and cached[0] == revisions:
+                data = cached[1]
+            else:
                 payload = {
                     "ok": True,
                     "world_revision": STATE.world_revision,
@@ -457,103 +787,104 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     "world_save_path": _format_save_path(STATE.current_save),
                     "character_save_path": _format_save_path(STATE.last_character_save),
                 }
-            self._send_json(payload)
+                data = _COMPACT_JSON.encode(payload).encode("utf-8")
+                STATE.updates_data = (revisions, data)
+        self._send_body(data)
+
+    def _api_world_snapshots(self, parsed) -> None:
+        snapshots = _list_world_snapshots()
+        self._send_json({"ok": True, "snapshots": snapshots})
+
+    def _api_character_snapshots(self, parsed) -> None:
+        snapshots = _list_character_snapshots()
+        self._send_json({"ok": True, "snapshots": snapshots})
+
+    def _api_characters(self, parsed) -> None:
+        query = parse_qs(parsed.query)
+        snapshot_path = (query.get("path") or [""])[0]
+        if not snapshot_path:
+            self._send_json({"ok": False, "error": "missing_path"}, status=400)
             return
-        if parsed.path == "/api/world/snapshots":
-            snapshots = _list_world_snapshots()
-            self._send_json({"ok": True, "snapshots": snapshots})
-            return
-        if parsed.path == "/api/characters/snapshots":
-            snapshots = _list_character_snapshots()
-            self._send_json({"ok": True, "snapshots": snapshots})
+        resolved = _resolve_snapshot_path(snapshot_path)
+        if not resolved or not resolved.exists():
+            self._send_json({"ok": False, "error": "snapshot_not_found"}, status=404)
             return
-        if parsed.path == "/api/characters":
-            query = parse_qs(parsed.query)
-            snapshot_path = (query.get("path") or [""])[0]
-            if not snapshot_path:
-                self._send_json({"ok": False, "error": "missing_path"}, status=400)
-                return
-            resolved = _resolve_snapshot_path(snapshot_path)
-            if not resolved or not resolved.exists():
-                self._send_json({"ok": False, "error": "snapshot_not_found"}, status=404)
-                return
-            try:
-                payload = json.loads(resolved.read_text(encoding="utf-8"))
-            except json.JSONDecodeError as exc:
-                self._send_json(
-                    {"ok": False, "error": f"invalid_snapshot: {exc}"},
-                    status=400,
-                )
-                return
+        raw = resolved.read_bytes()
+        try:
+            payload = json.loads(raw)
+        except json.JSONDecodeError as exc:
             self._send_json(
-                {
-                    "ok": True,
-                    "snapshot": payload,
-                    "path": str(resolved.relative_to(SAVE_ROOT)),
-                }
+                {"ok": False, "error": f"invalid_snapshot: {exc}"},
+                status=400,
             )
             return
-
-        if parsed.path == "/api/progress":
-            query = parse_qs(parsed.query)
-            job_id = (query.get("id") or [""])[0]
-            if not job_id:
-                self._send_json({"ok": False, "error": "missing_id"}, status=400)
-                return
-            with STATE.lock:
-                job = STATE.jobs.get(job_id)
-            if not job:
-                self._send_json({"ok": False, "error": "job_not_found"}, status=404)
-                return
-            payload = {
-                "ok": True,
-                "status": job.status,
-                "total": job.total,
-                "completed": job.completed,
-                "message": job.message,
-                "save_path": job.save_path,
-                "kind": job.kind,
-                "phase": job.phase,
-                "macro_total": job.macro_total,
-                "micro_total": job.micro_total,
-                "stage_completed": job.stage_completed,
-                "stage_total": job.stage_total,
-                "ready": job.ready,
-            }
-            self._send_json(payload)
+        rel_path = str(resolved.relative_to(SAVE_ROOT))
+        encoding = json.detect_encoding(raw)
+        if encoding not in {"utf-8", "utf-8-sig"}:
+            self._send_json({"ok": True, "snapshot": payload, "path": rel_path})
             return
+        # The file is valid UTF-8 JSON, so embed it as-is rather than re-encoding it.
+        suffix = json.dumps(rel_path, ensure_ascii=False)
+        self._send_body(
+            b'{"ok":true,"snapshot":',
+            raw[3:] if encoding == "utf-8-sig" else raw,
+            f',"path":{suffix}}}'.encode("utf-8"),
+        )
 
-        self.send_error(404, "Not found")
+    def _api_progress(self, parsed) -> None:
+        query = parse_qs(parsed.query)
+        job_id = (query.get("id") or [""])[0]
+        if not job_id:
+            self._send_json({"ok": False, "error": "missing_id"}, status=400)
+            return
+        with STATE.jobs_lock:
+            job = STATE.jobs.get(job_id)
+        if not job:
+            self._send_json({"ok": False, "error": "job_not_found"}, status=404)
+            return
+        payload = {
+            "ok": True,
+            "status": job.status,
+            "total": job.total,
+            "completed": job.completed,
+            "message": job.message,
+            "save_path": job.save_path,
+            "kind": job.kind,
+            "phase": job.phase,
+            "macro_total": job.macro_total,
+            "micro_total": job.micro_total,
+            "stage_completed": job.stage_completed,
+            "stage_total": job.stage_total,
+            "ready": job.ready,
+        }
+        self._send_json(payload)
 
     def _handle_api_post(self, parsed) -> None:
+        handler = self._POST_ROUTES.get(parsed.path)
+        if handler is None:
+            self.send_error(404, "Not found")
+            return
         length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_REQUEST_BODY:
+            self._request_error_detail = f"content_length={length}"
+            # The body is left unread, so the connection cannot be reused.
+            self.close_connection = True
+            self._send_json({"ok": False, "error": "payload_too_large"}, status=413)
+            return
         raw = self.rfile.read(length) if length else b""
-        self._request_raw = raw.decode("utf-8", errors="replace") if raw else ""
+        self._request_raw = raw
         try:
-            payload = json.loads(self._request_raw) if raw else {}
+            try:
+                # json.loads takes bytes directly, so well-formed bodies skip the str copy.
+                payload = json.loads(raw) if raw else {}
+            except UnicodeDecodeError:
+                payload = json.loads(raw.decode("utf-8", errors="replace"))
         except json.JSONDecodeError as exc:
             self._request_error_detail = f"json_decode_error: {exc}"
             self._send_json({"ok": False, "error": "invalid_json"}, status=400)
             return
         self._request_payload = payload
-
-        if parsed.path == "/api/generate":
-            self._handle_generate(payload)
-            return
-        if parsed.path == "/api/import":
-            self._handle_import(payload)
-            return
-        if parsed.path == "/api/update":
-            self._handle_update(payload)
-            return
-        if parsed.path == "/api/characters/generate":
-            self._handle_character_generate(payload)
-            return
-        if parsed.path == "/api/game/plan":
-            self._handle_game_plan(payload)
-            return
-
-        self.send_error(404, "Not found")
+        getattr(self, handler)(payload)
 
     def _handle_generate(self, payload: Dict[str, Any]) -> None:
         prompt = str(payload.get("prompt", "")).strip()
@@ -564,7 +895,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
 
         job_id = uuid.uuid4().hex
         job = GenerationJob(job_id=job_id, total=0, kind="world", phase="macro")
-        with STATE.lock:
+        with STATE.jobs_lock:
             STATE.jobs[job_id] = job
             STATE.world_job_id = job_id
 
@@ -579,8 +910,13 @@ class RequestHandler(SimpleHTTPRequestHandler):
                 stage_one_saved = True
                 snapshot = engine.as_dict()
                 micro_total = len(engine._iter_micro_nodes())
-                _write_snapshot(snapshot, save_path)
+                snapshot_data = _write_snapshot(snapshot, save_path)
                 with STATE.lock:
+                    STATE.snapshot = snapshot
+                    STATE.snapshot_data = snapshot_data
+                    STATE.current_save = save_path
+                    _mark_world_updated(save_path)
+                with STATE.jobs_lock:
                     job.ready = True
                     job.phase = "micro"
                     job.micro_total = micro_total
@@ -588,12 +924,9 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     job.stage_completed = 0
                     job.message = "第一阶段完成，生成细节中..."
                     job.save_path = str(save_path)
-                    STATE.snapshot = snapshot
-                    STATE.current_save = save_path
-                    _mark_world_updated(save_path)
 
-            def progress_cb(node, completed: int, total: int) -> None:
-                with STATE.lock:
+            def apply_progress(completed: int, total: int) -> None:
+                with STATE.jobs_lock:
                     job.completed = completed
                     job.total = total
                     if job.phase == "micro":
@@ -602,15 +935,22 @@ class RequestHandler(SimpleHTTPRequestHandler):
                         job.stage_total = job.macro_total or total
                         job.stage_completed = completed
 
+            throttle = ProgressThrottle(apply_progress)
+
+            def progress_cb(node, completed: int, total: int) -> None:
+                throttle(completed, total)
+
             try:
                 engine = WorldEngine(
                     world_spec_path=str(WORLD_SPEC),
+                    world_spec_text=_load_world_spec_text(WORLD_SPEC),
                     user_pitch=prompt,
+                    llm_client=_get_llm_client(),
                     micro_scale=scale,
                     auto_generate=False,
                 )
                 macro_total = len(engine._iter_macro_nodes())
-                with STATE.lock:
+                with STATE.jobs_lock:
                     job.macro_total = macro_total
                     job.stage_total = macro_total
                 original_generate_micro_structure = engine._generate_micro_structure
@@ -624,18 +964,21 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     prompt,
                     progress_callback=progress_cb,
                 )
+                throttle.flush()
                 snapshot = engine.as_dict()
-                _write_snapshot(snapshot, save_path)
+                snapshot_data = _write_snapshot(snapshot, save_path)
                 with STATE.lock:
+                    STATE.snapshot = snapshot
+                    STATE.snapshot_data = snapshot_data
+                    STATE.current_save = save_path
+                    _mark_world_updated(save_path)
+                with STATE.jobs_lock:
                     job.status = "done"
                     job.completed = job.total
                     job.save_path = str(save_path)
                     job.phase = "done"
                     job.ready = True
                     job.message = "生成完成"
-                    STATE.snapshot = snapshot
-                    STATE.current_save = save_path
-                    _mark_world_updated(save_path)
             except Exception as exc:
                 self.logger.exception(
                     "generate_world failed job_id=%s prompt_len=%s save_path=%s",
@@ -643,7 +986,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     len(prompt),
                     save_path,
                 )
-                with STATE.lock:
+                with STATE.jobs_lock:
                     job.status = "error"
                     job.message = str(exc)
 
@@ -679,28 +1022,34 @@ class RequestHandler(SimpleHTTPRequestHandler):
             message="准备生成角色",
             kind="character",
         )
-        with STATE.lock:
+        with STATE.jobs_lock:
             STATE.jobs[job_id] = job
 
-        def progress_cb(completed: int, total_chars: int) -> None:
-            with STATE.lock:
+        def apply_progress(completed: int, total_chars: int) -> None:
+            with STATE.jobs_lock:
                 job.completed = completed
                 job.total = total_chars + 2
                 job.message = f"角色生成 {completed}/{total_chars}"
 
+        progress_cb = ProgressThrottle(apply_progress)
+
         def worker() -> None:
             try:
-                engine = CharacterEngine.from_world_snapshot(snapshot_path)
+                _flush_snapshot_writes()
+                engine = CharacterEngine.from_world_snapshot(
+                    snapshot_path, llm_client=_get_llm_client()
+                )
                 request = CharacterRequest(total=total, pitch=pitch)
                 records = engine.generate_characters(
                     request, progress_callback=progress_cb
                 )
-                with STATE.lock:
+                progress_cb.flush()
+                with STATE.jobs_lock:
                     job.completed = max(job.completed, total)
                     job.message = "角色生成完成，生成关系..."
 
                 relations = engine.generate_relations(records)
-                with STATE.lock:
+                with STATE.jobs_lock:
                     job.completed = total + 1
                     job.message = "角色关系生成完成，生成地点关系..."
 
@@ -708,6 +1057,8 @@ class RequestHandler(SimpleHTTPRequestHandler):
                 save_path = SAVE_ROOT / "characters" / f"characters_{_timestamp()}.json"
                 engine.save_snapshot(save_path, records)
                 with STATE.lock:
+                    _mark_character_updated(save_path)
+                with STATE.jobs_lock:
                     job.status = "done"
                     job.completed = total + 2
                     job.save_path = str(save_path)
@@ -715,7 +1066,6 @@ class RequestHandler(SimpleHTTPRequestHandler):
                         f"完成：角色 {len(records)} / 关系 {len(relations)} "
                         f"/ 地点关系 {len(location_edges)}"
                     )
-                    _mark_character_updated(save_path)
             except Exception as exc:
                 self.logger.exception(
                     "generate_characters failed job_id=%s total=%s snapshot_path=%s",
@@ -723,7 +1073,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     total,
                     snapshot_path,
                 )
-                with STATE.lock:
+                with STATE.jobs_lock:
                     job.status = "error"
                     job.message = str(exc)
 
@@ -754,10 +1104,18 @@ class RequestHandler(SimpleHTTPRequestHandler):
         candidate_paths = [SAVE_ROOT / "world" / safe_name, SAVE_ROOT / safe_name]
         save_path = next((path for path in candidate_paths if path.exists()), candidate_paths[-1])
         with STATE.lock:
-            _write_snapshot(snapshot, save_path)
+            STATE.snapshot_data = _queue_snapshot_write(snapshot, save_path)
             STATE.snapshot = snapshot
             STATE.current_save = save_path
             _mark_world_updated(save_path)
+        if _coerce_bool(payload.get("sync")):
+            write_error = _flush_snapshot_writes(save_path)
+            if write_error:
+                self._send_json(
+                    {"ok": False, "error": "snapshot_write_failed", "detail": write_error},
+                    status=500,
+                )
+                return
 
         self._send_json({"ok": True, "save_path": str(save_path)})
 
@@ -771,34 +1129,52 @@ class RequestHandler(SimpleHTTPRequestHandler):
             self._send_json({"ok": False, "error": "missing_value"}, status=400)
             return
 
-        with STATE.lock:
+        with STATE.jobs_lock:
             world_job = (
                 STATE.jobs.get(STATE.world_job_id)
                 if STATE.world_job_id
                 else None
             )
-            if (
+            generation_running = bool(
                 world_job
                 and world_job.kind == "world"
                 and world_job.status == "running"
-            ):
+            )
+        if generation_running:
+            self._send_json(
+                {"ok": False, "error": "world_generation_running"},
+                status=409,
+            )
+            return
+
+        error = ""
+        save_path: Optional[Path] = None
+        with STATE.lock:
+            node = STATE.snapshot.get(identifier) if STATE.snapshot else None
+            if not STATE.snapshot:
+                error = "no_snapshot"
+            elif not node:
+                error = "node_not_found"
+            else:
+                node["value"] = value
+                if not STATE.current_save:
+                    STATE.current_save = (
+                        SAVE_ROOT / "world" / f"world_{_timestamp()}.json"
+                    )
+                save_path = STATE.current_save
+                STATE.snapshot_data = _queue_snapshot_write(STATE.snapshot, save_path)
+                _mark_world_updated(save_path)
+        if error:
+            self._send_json({"ok": False, "error": error}, status=404)
+            return
+        if _coerce_bool(payload.get("sync")):
+            write_error = _flush_snapshot_writes(save_path)
+            if write_error:
                 self._send_json(
-                    {"ok": False, "error": "world_generation_running"},
-                    status=409,
+                    {"ok": False, "error": "snapshot_write_failed", "detail": write_error},
+                    status=500,
                 )
                 return
-            if not STATE.snapshot:
-                self._send_json({"ok": False, "error": "no_snapshot"}, status=404)
-                return
-            node = STATE.snapshot.get(identifier)
-            if not node:
-                self._send_json({"ok": False, "error": "node_not_found"}, status=404)
-                return
-            node["value"] = value
-            if not STATE.current_save:
-                STATE.current_save = SAVE_ROOT / "world" / f"world_{_timestamp()}.json"
-            _write_snapshot(STATE.snapshot, STATE.current_save)
-            _mark_world_updated(STATE.current_save)
 
         self._send_json({"ok": True})
 
@@ -808,7 +1184,11 @@ class RequestHandler(SimpleHTTPRequestHandler):
             self._send_json({"ok": False, "error": "missing_text"}, status=400)
             return
         apply_updates = _coerce_bool(payload.get("apply"), default=True)
-        snapshot, snapshot_path = _load_world_snapshot()
+        stream = _coerce_bool(payload.get("stream"))
+        streaming = False
+        # Queued edits must land before this request reads or rewrites snapshot files.
+        _flush_snapshot_writes()
+        snapshot, snapshot_path, revisions = _load_world_snapshot()
         if not snapshot:
             self._send_json({"ok": False, "error": "no_world_snapshot"}, status=404)
             return
@@ -826,16 +1206,13 @@ class RequestHandler(SimpleHTTPRequestHandler):
         )
 
         try:
-            llm_client = LLMClient()
-            if snapshot_path:
-                world_engine = WorldEngine.from_snapshot(
-                    snapshot_path, llm_client=llm_client
-                )
-            else:
-                world_engine = WorldEngine(
-                    world_spec_path=None, llm_client=llm_client, auto_generate=False
-                )
-                world_engine.apply_snapshot(snapshot)
+            llm_client = _get_llm_client()
+            # The snapshot is already parsed (usually straight from STATE), so
+            # hydrate the engine from it instead of reading the file again.
+            world_engine = WorldEngine(
+                world_spec_path=None, llm_client=llm_client, auto_generate=False
+            )
+            world_engine.apply_snapshot(snapshot)
 
             records, character_payload = _load_character_snapshot(character_snapshot_path)
             character_engine = CharacterEngine(
@@ -848,9 +1225,9 @@ class RequestHandler(SimpleHTTPRequestHandler):
                 relations = character_payload.get("relations") or []
                 location_edges = character_payload.get("character_location_edges") or []
                 if isinstance(relations, list):
-                    character_engine.relations = list(relations)
+                    character_engine.relations = relations
                 if isinstance(location_edges, list):
-                    character_engine.location_edges = list(location_edges)
+                    character_engine.location_edges = location_edges
                 payload_world_path = str(
                     character_payload.get("world_snapshot_path", "")
                 ).strip()
@@ -869,7 +1246,26 @@ class RequestHandler(SimpleHTTPRequestHandler):
                 llm_client=llm_client,
             )
 
-            decision = game_agent.decide_updates(text)
+            decision = _cached_decide_updates(
+                game_agent,
+                text,
+                revisions,
+                (str(snapshot_path), str(character_snapshot_path)),
+            )
+            if decision.raw.startswith(LLM_ERROR_PREFIX):
+                # chat_once reports failures as text; planning on top of it would
+                # turn a dead backend into a confident "no update" answer.
+                self._send_json({"ok": False, "error": decision.raw}, status=502)
+                return
+            decision_info = {
+                "update_world": decision.update_world,
+                "update_characters": decision.update_characters,
+                "reason": decision.reason,
+            }
+            if stream:
+                self._start_event_stream()
+                streaming = True
+                self._send_event("decision", decision_info)
             actions: list[Dict[str, str]] = []
             applied = {"world": False, "character": False}
             current_snapshot = snapshot
@@ -886,59 +1282,66 @@ class RequestHandler(SimpleHTTPRequestHandler):
             else:
                 world_snapshot_before = {}
                 character_snapshot_before = {}
+            character_future = None
+            if not apply_updates and decision.update_world and decision.update_characters:
+                # A plan-only run leaves the world untouched, so the character agent
+                # sees the same snapshot either way and can plan alongside the world agent.
+                character_future = _PLAN_EXECUTOR.submit(
+                    _collect_agent_actions, character_agent, text
+                )
             if decision.update_world:
-                if hasattr(world_agent, "collect_actions"):
-                    world_decisions = world_agent.collect_actions(text)
-                else:
-                    world_decisions = world_agent.decide_actions(text)
+                world_decisions = _collect_agent_actions(world_agent, text)
                 if apply_updates:
                     world_nodes = world_agent.apply_updates(world_decisions, text)
                     current_snapshot = world_engine.as_dict()
                     if not world_save_path:
                         world_save_path = SAVE_ROOT / f"world_{_timestamp()}.json"
-                    _write_snapshot(current_snapshot, world_save_path)
+                    snapshot_data = _queue_snapshot_write(current_snapshot, world_save_path)
                     with STATE.lock:
                         STATE.snapshot = current_snapshot
+                        STATE.snapshot_data = snapshot_data
                         STATE.current_save = world_save_path
                         _mark_world_updated(world_save_path)
                     applied["world"] = True
-                for idx, world_decision in enumerate(world_decisions):
-                    node_label = ""
-                    if apply_updates:
-                        node = world_nodes[idx] if idx < len(world_nodes) else None
-                        node_label = node.key if node else ""
-                    else:
-                        node = world_engine.view_node(world_decision.index)
-                        node_label = node.key
-                    actions.append(
-                        {
-                            "agent": "world",
-                            "action": _normalize_action_name(world_decision.flag),
-                            "target": world_decision.index,
-                            "label": node_label,
-                        }
-                    )
                 if apply_updates:
+                    node_labels = [node.key if node else "" for node in world_nodes]
+                else:
+                    view_node = world_engine.view_node
+                    node_labels = [
+                        view_node(world_decision.index).key
+                        for world_decision in world_decisions
+                    ]
+                normalize = _normalize_action_name
+                world_actions = [
+                    {
+                        "agent": "world",
+                        "action": normalize(world_decision.flag),
+                        "target": world_decision.index,
+                        "label": node_labels[idx] if idx < len(node_labels) else "",
+                    }
+                    for idx, world_decision in enumerate(world_decisions)
+                ]
+                actions.extend(world_actions)
+                if streaming:
+                    for action in world_actions:
+                        self._send_event("action", action)
+                if apply_updates:
+                    # The only point where the engine's world view changes after
+                    # construction; the character branch below reuses it as-is.
                     character_engine.set_world_snapshot(current_snapshot)
                     character_engine.world_snapshot_path = world_save_path
             if decision.update_characters:
-                if hasattr(character_agent, "collect_actions"):
-                    character_decisions = character_agent.collect_actions(text)
+                if character_future:
+                    character_decisions = character_future.result()
                 else:
-                    character_decisions = character_agent.decide_actions(text)
+                    character_decisions = _collect_agent_actions(character_agent, text)
                 label = ""
-                if current_snapshot:
-                    character_engine.set_world_snapshot(current_snapshot)
-                if world_save_path:
-                    character_engine.world_snapshot_path = world_save_path
                 if apply_updates:
                     character_records = character_agent.apply_updates(
                         character_decisions, text
                     )
                     if character_records:
-                        record = character_records[-1]
-                        if isinstance(record.profile, dict):
-                            label = str(record.profile.get("name", "")).strip()
+                        label = _character_label(character_records[-1])
                     character_save_path = character_save_path or (
                         SAVE_ROOT / "characters" / f"characters_{_timestamp()}.json"
                     )
@@ -948,37 +1351,36 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     with STATE.lock:
                         _mark_character_updated(character_save_path)
                     applied["character"] = True
-                for idx, character_decision in enumerate(character_decisions):
-                    label = ""
-                    if apply_updates:
-                        record = (
-                            character_records[idx]
-                            if idx < len(character_records)
-                            else None
-                        )
-                        if record and isinstance(record.profile, dict):
-                            label = str(record.profile.get("name", "")).strip()
-                    else:
-                        for record in character_engine.records:
-                            if record.identifier == character_decision.identifier:
-                                if isinstance(record.profile, dict):
-                                    label = str(record.profile.get("name", "")).strip()
-                                break
-                    actions.append(
-                        {
-                            "agent": "character",
-                            "action": _normalize_action_name(character_decision.flag),
-                            "target": character_decision.identifier,
-                            "label": label,
-                        }
-                    )
+                if apply_updates:
+                    record_labels = [
+                        _character_label(record) for record in character_records
+                    ]
+                else:
+                    # reversed() so the first record wins, as the old linear scan did.
+                    records_by_id: Dict[str, CharacterRecord] = {
+                        record.identifier: record
+                        for record in reversed(character_engine.records)
+                    }
+                    record_labels = [
+                        _character_label(records_by_id.get(character_decision.identifier))
+                        for character_decision in character_decisions
+                    ]
+                normalize = _normalize_action_name
+                character_actions = [
+                    {
+                        "agent": "character",
+                        "action": normalize(character_decision.flag),
+                        "target": character_decision.identifier,
+                        "label": record_labels[idx] if idx < len(record_labels) else "",
+                    }
+                    for idx, character_decision in enumerate(character_decisions)
+                ]
+                actions.extend(character_actions)
+                if streaming:
+                    for action in character_actions:
+                        self._send_event("action", action)
 
             if apply_updates:
-                decision_payload = {
-                    "update_world": decision.update_world,
-                    "update_characters": decision.update_characters,
-                    "reason": decision.reason,
-                }
                 history_world_changes = game_agent._build_world_changes(
                     world_decisions, world_nodes, world_snapshot_before
                 )
@@ -989,7 +1391,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
                 )
                 history_engine.record(
                     text,
-                    decision_payload,
+                    decision_info,
                     history_world_changes,
                     history_character_changes,
                 )
@@ -997,11 +1399,7 @@ class RequestHandler(SimpleHTTPRequestHandler):
 
             response = {
                 "ok": True,
-                "decision": {
-                    "update_world": decision.update_world,
-                    "update_characters": decision.update_characters,
-                    "reason": decision.reason,
-                },
+                "decision": decision_info,
                 "actions": actions,
                 "applied": applied,
                 "context": {
@@ -1011,24 +1409,50 @@ class RequestHandler(SimpleHTTPRequestHandler):
                     "character_count": len(character_engine.records),
                 },
             }
-            self._send_json(response)
+            if streaming:
+                self._send_event("done", response)
+            else:
+                self._send_json(response)
         except Exception as exc:
             self.logger.exception(
                 "game_plan failed text_len=%s world_snapshot=%s",
                 len(text),
                 snapshot_path,
             )
-            self._send_json({"ok": False, "error": str(exc)}, status=500)
+            error = {"ok": False, "error": str(exc)}
+            if streaming:
+                # Headers already went out as 200, so the failure travels as an event.
+                self._log_api_error(error, 500)
+                self._send_event("error", error)
+            else:
+                self._send_json(error, status=500)
 
     def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
         if status >= 400 or (isinstance(payload, dict) and payload.get("ok") is False):
             self._log_api_error(payload, status)
-        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        data = _COMPACT_JSON.encode(payload).encode("utf-8")
+        self._send_body(data, status=status)
+
+    def _send_body(self, *chunks: bytes, status: int = 200) -> None:
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Length", str(sum(len(chunk) for chunk in chunks)))
         self.end_headers()
-        self.wfile.write(data)
+        for chunk in chunks:
+            self.wfile.write(chunk)
+
+    def _start_event_stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        # No Content-Length: the stream ends when the connection closes.
+        self.close_connection = True
+
+    def _send_event(self, event: str, payload: Dict[str, Any]) -> None:
+        data = _COMPACT_JSON.encode(payload)
+        self.wfile.write(f"event: {event}\ndata: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
 
 
 def run() -> None:
@@ -1038,6 +1462,8 @@ def run() -> None:
         server.serve_forever()
     except KeyboardInterrupt:
         pass
+    finally:
+        _flush_snapshot_writes()
 
 
 if __name__ == "__main__":
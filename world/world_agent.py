@@ -66,21 +66,33 @@ class WorldAgent:
                 prompt, system_prompt=self._system_prompt(), log_label="EXTRACT"
             )
             identifier = self._parse_query_identifier(response)
-            if not identifier:
-                self.logger.info("extract_info miss query_len=%s", len(query))
-                return "无相关信息"
-            node = self.engine.nodes.get(identifier)
-            if not node or not node.value.strip():
-                self.logger.info("extract_info empty id=%s", identifier)
-                return "无相关信息"
-            self.logger.info(
-                "extract_info hit id=%s value_len=%s", identifier, len(node.value)
-            )
-            return node.value
+            return self._resolve_extract_value(identifier, query)
         except Exception:
             self.logger.exception("extract_info failed query_len=%s", len(query))
             raise
 
+    def extract_info_batch(self, queries: list[str]) -> list[str]:
+        if len(queries) <= 1:
+            return [self.extract_info(query) for query in queries]
+        try:
+            prompt = self._build_extract_batch_prompt(queries)
+            response = self._chat_once(
+                prompt, system_prompt=self._system_prompt(), log_label="EXTRACT_BATCH"
+            )
+            identifiers = self._parse_query_identifiers(response, len(queries))
+        except Exception:
+            self.logger.exception("extract_info_batch failed queries=%s", len(queries))
+            raise
+        if identifiers is None:
+            self.logger.info(
+                "extract_info_batch parse failed, fallback queries=%s", len(queries)
+            )
+            return [self.extract_info(query) for query in queries]
+        return [
+            self._resolve_extract_value(identifier, query)
+            for identifier, query in zip(identifiers, queries)
+        ]
+
     def decide_action(self, update_info: str) -> ActionDecision:
         decisions = self.decide_actions(update_info)
         if len(decisions) > 1:
@@ -219,6 +231,58 @@ class WorldAgent:
             )
             raise
 
+    def apply_update_batch(
+        self, flag: str, index: str, update_infos: list[str]
+    ) -> list[WorldNode | Exception]:
+        # Items succeed or fail independently; a failed item's slot holds its exception.
+        groups: list[Optional[str]] = [None] * len(update_infos)
+        parent: Optional[WorldNode] = None
+        if self._normalize_flag(flag) == ADD_TAG and len(update_infos) > 1:
+            try:
+                parent = self.engine.view_node(index)
+                if not self._is_macro_branch(parent):
+                    prompt = self._build_add_batch_prompt(parent, update_infos)
+                    response = self._chat_once(
+                        prompt,
+                        system_prompt=self._system_prompt(),
+                        log_label="ADD_NODE_BATCH",
+                    )
+                    groups = self._split_batch_groups(response, len(update_infos))
+            except Exception:
+                self.logger.exception(
+                    "apply_update_batch prompt failed, fallback index=%s infos=%s",
+                    index,
+                    len(update_infos),
+                )
+        results: list[WorldNode | Exception] = []
+        for item, (info, group) in enumerate(zip(update_infos, groups), start=1):
+            try:
+                if group is None or parent is None:
+                    node = self.apply_update(flag, index, info)
+                else:
+                    pairs = self._parse_key_and_values(group, info)
+                    node = self._add_parsed_pairs(parent, pairs)
+            except Exception as exc:
+                self.logger.exception(
+                    "apply_update_batch item failed flag=%s index=%s item=%s",
+                    flag,
+                    index,
+                    item,
+                )
+                results.append(exc)
+                continue
+            results.append(node)
+        self.logger.info(
+            "apply_update_batch flag=%s parent=%s results=%s",
+            flag,
+            index,
+            [
+                result.identifier if isinstance(result, WorldNode) else "error"
+                for result in results
+            ],
+        )
+        return results
+
     def apply_updates(
         self, actions: Iterable[ActionDecision], update_info: str
     ) -> list[WorldNode]:
@@ -278,19 +342,62 @@ class WorldAgent:
             raise
 
     # Prompt builders -----------------------------------------------------
+    # Per-call text (query / update info) goes last so the node list stays a stable prefix.
     def _build_extract_prompt(self, query: str) -> str:
         lines = [
             "【任务】选择查询节点",
             "从下列编号中选择最相关的一项。",
             "只输出编号本身，不要输出其他内容。",
             "如果没有相关信息，只输出：无相关信息。",
-            f"查询：{query.strip()}",
             "可用编号：",
         ]
         for node in self._iter_nodes():
             lines.append(f"- {node.identifier} {node.key}")
+        lines.append(f"查询：{query.strip()}")
+        return "\n".join(lines)
+
+    def _build_extract_batch_prompt(self, queries: list[str]) -> str:
+        lines = [
+            "【任务】批量选择查询节点",
+            "为每条查询从下列编号中选择最相关的一项。",
+            "只输出一个 JSON 数组，按查询顺序给出编号字符串，不要输出其他内容。",
+            "某条查询没有相关信息时，该位置输出：无相关信息。",
+            "可用编号：",
+        ]
+        for node in self._iter_nodes():
+            lines.append(f"- {node.identifier} {node.key}")
+        lines.append("查询：")
+        for position, query in enumerate(queries, start=1):
+            lines.append(f"{position}. {query.strip()}")
         return "\n".join(lines)
 
+    def _parse_query_identifiers(
+        self, response: str, expected: int
+    ) -> Optional[list[str]]:
+        match = re.search(r"\[.*\]", response, flags=re.DOTALL)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, list) or len(data) != expected:
+            return None
+        return [self._parse_query_identifier(str(item)) for item in data]
+
+    def _resolve_extract_value(self, identifier: Optional[str], query: str) -> str:
+        if not identifier:
+            self.logger.info("extract_info miss query_len=%s", len(query))
+            return "无相关信息"
+        node = self.engine.nodes.get(identifier)
+        if not node or not node.value.strip():
+            self.logger.info("extract_info empty id=%s", identifier)
+            return "无相关信息"
+        self.logger.info(
+            "extract_info hit id=%s value_len=%s", identifier, len(node.value)
+        )
+        return node.value
+
     def _parse_query_identifier(self, response: str) -> str:
         cleaned = response.strip().strip("\"'")
         if cleaned in {"无相关信息", "无"}:
@@ -317,7 +424,6 @@ class WorldAgent:
             f"1) {ADD_TAG}:INDEX 或 {UPDATE_TAG}:INDEX 或 {REMOVE_TAG}:INDEX (多条用逗号分隔)",
             '2) [{"action":"ADD_NODE"|"UPDATE_NODE"|"REMOVE_NODE","index":"INDEX"}, ...]',
             "INDEX 必须是已有父节点或待删除节点的标识，ADD 时不要输出新节点 ID 或子路径。",
-            f"剧情信息：{update_info.strip()}",
         ]
         micro_nodes: list[WorldNode] = []
         macro_nodes: list[WorldNode] = []
@@ -341,6 +447,7 @@ class WorldAgent:
             lines.append("可用其他节点：")
             for node in other_nodes:
                 lines.append(f"- {node.identifier} {node.key}")
+        lines.append(f"剧情信息：{update_info.strip()}")
         return "\n".join(lines)
 
     def _build_update_prompt(self, node: WorldNode, update_info: str) -> str:
@@ -387,6 +494,46 @@ class WorldAgent:
         )
         return "\n".join(lines)
 
+    def _build_add_batch_prompt(self, parent: WorldNode, update_infos: list[str]) -> str:
+        parent_content = (parent.value or "").strip() or "无"
+        siblings = [child.key for child in parent.children.values()]
+        sibling_text = "、".join(siblings) if siblings else "无"
+        lines = [
+            "【任务】批量新增子节点内容",
+            "下列每条剧情信息各自新增节点，按编号分组输出，格式如下：",
+            "<|ITEM|>:编号",
+            "<|KEY|>:新节点名称",
+            "<|VALUE|>:新节点内容",
+        ]
+        if self._is_micro_branch(parent):
+            lines.append(
+                "每组内如需连续创建多层节点，可依次输出多组 KEY/VALUE，后一组父节点为前一组新节点。"
+            )
+        else:
+            lines.append("每组只输出一组 KEY/VALUE。")
+        lines.extend(
+            [
+                f"父节点：{parent.identifier} {parent.key}",
+                f"父节点内容：{parent_content}",
+                f"已有子节点名称：{sibling_text}",
+                "剧情信息：",
+            ]
+        )
+        for position, info in enumerate(update_infos, start=1):
+            lines.append(f"{position}. {info.strip()}")
+        return "\n".join(lines)
+
+    def _split_batch_groups(self, response: str, expected: int) -> list[Optional[str]]:
+        parts = re.split(r"<\|ITEM\|>\s*[:：]?\s*(\d+)", response)
+        groups: dict[int, str] = {}
+        for number, text in zip(parts[1::2], parts[2::2]):
+            groups.setdefault(int(number), text)
+        resolved: list[Optional[str]] = []
+        for position in range(1, expected + 1):
+            text = groups.get(position)
+            resolved.append(text if text and "<|KEY|>" in text else None)
+        return resolved
+
     # Core actions --------------------------------------------------------
     def _apply_update(self, index: str, update_info: str) -> WorldNode:
         node = self.engine.view_node(index)
@@ -408,6 +555,11 @@ class WorldAgent:
             prompt, system_prompt=self._system_prompt(), log_label="ADD_NODE"
         )
         pairs = self._parse_key_and_values(response, update_info)
+        return self._add_parsed_pairs(parent, pairs)
+
+    def _add_parsed_pairs(
+        self, parent: WorldNode, pairs: list[tuple[str, str]]
+    ) -> WorldNode:
         if not self._is_micro_branch(parent):
             pairs = pairs[:1]
         current_parent = parent
@@ -804,9 +956,9 @@ class WorldAgent:
                 '2) {"action":"ADD|REMOVE|NONE","items":['
                 '{"region":"...","polity":"..."},...],"reason":"..."}'
             ),
-            f"剧情信息：{update_info.strip()}",
             f"现有地区：{region_text}",
             f"现有政权：{polity_text}",
+            f"剧情信息：{update_info.strip()}",
         ]
         return "\n".join(lines)
 